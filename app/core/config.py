@@ -49,6 +49,11 @@ class Settings(BaseSettings):
     )
     imap_mailbox: str = Field("INBOX", env="IMAP_MAILBOX")
     imap_archive_mailbox: str = Field("Archive", env="IMAP_ARCHIVE_MAILBOX")
+    imap_fetch_workers: int = Field(
+        4,
+        env="IMAP_FETCH_WORKERS",
+        description="Extra IMAP sessions used to fetch large backlogs concurrently; 1 disables",
+    )
 
     exchange_tenant_id: Optional[str] = Field(
         None,
@@ -114,8 +119,28 @@ class Settings(BaseSettings):
     poll_interval_seconds: int = Field(120, env="POLL_INTERVAL_SECONDS")
     full_sort_interval_minutes: int = Field(180, env="FULL_SORT_INTERVAL_MINUTES")
 
+    classification_cache_ttl_hours: int = Field(
+        168,
+        env="CLASSIFICATION_CACHE_TTL_HOURS",
+        description="Hours a cached classification is reused before the model is asked again",
+    )
     ollama_model: str = Field("gpt-oss:20b", env="OLLAMA_MODEL")
     ollama_endpoint: str = Field("http://ollama.local:11434", env="OLLAMA_ENDPOINT")
+    ollama_concurrency: int = Field(
+        2,
+        env="OLLAMA_CONCURRENCY",
+        description="Classification requests allowed in flight at once; match Ollama's OLLAMA_NUM_PARALLEL",
+    )
+    ollama_keep_alive: int = Field(
+        -1,
+        env="OLLAMA_KEEP_ALIVE",
+        description="Seconds Ollama keeps the model loaded after a request; -1 keeps it resident",
+    )
+    ollama_num_predict: Optional[int] = Field(
+        None,
+        env="OLLAMA_NUM_PREDICT",
+        description="Optional cap on tokens generated per classification, including any reasoning",
+    )
 
     ha_base_url: Optional[str] = Field(
         "http://homeassistant.local:8123",
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import Table, create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, SQLModel
 
 from app.core.config import settings
@@ -18,3 +19,12 @@ def init_db() -> None:
 def get_session() -> Session:
     with Session(engine) as session:
         yield session
+
+
+def upsert(model: type[SQLModel]):  # noqa: ANN201
+    """Return a dialect-specific INSERT supporting ``on_conflict_do_update``."""
+
+    table: Table = model.__table__  # type: ignore[attr-defined]
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -12,7 +12,8 @@ from app.core.config import settings
 from app.core.database import init_db
 from app.core.logging import configure_logging
 from app.routes import api, ui
-from app.services.actions import processor
+from app.services.actions import get_processor
+from app.services.ollama import classifier
 
 configure_logging(settings.log_level)
 
@@ -20,6 +21,8 @@ configure_logging(settings.log_level)
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ANN001
     init_db()
+    processor = get_processor()
+    processor.start_log_writer()
     task = asyncio.create_task(_background_poll())
     try:
         yield
@@ -27,9 +30,12 @@ async def lifespan(app: FastAPI):  # noqa: ANN001
         task.cancel()
         with contextlib.suppress(Exception):
             await task
+        await processor.stop_log_writer()
+        await classifier.close()
 
 
 async def _background_poll() -> None:
+    processor = get_processor()
     while True:
         await processor.process_seen_messages()
         await asyncio.sleep(settings.poll_interval_seconds)
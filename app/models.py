@@ -30,6 +30,14 @@ class EmailMessage(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ClassificationCache(SQLModel, table=True):
+    __tablename__ = "classification_cache"
+
+    content_hash: str = Field(primary_key=True, description="Digest of subject, sender, and body")
+    classification: dict[str, Any] = Field(sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class FolderHint(SQLModel, table=True):
     __tablename__ = "folder_hints"
     __table_args__ = (UniqueConstraint("hint", "folder", name="uq_hint_folder"),)
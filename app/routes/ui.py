@@ -15,7 +15,7 @@ from sqlmodel import select
 from app.core.config import settings
 from app.core.database import get_session
 from app.models import CalendarEvent, ConflictLog, EmailMessage
-from app.services.actions import processor
+from app.services.actions import get_processor
 from app.services.email_client import email_client, exchange_auth_manager
 from app.services.notifications import notifier
 from app.services.ollama import classifier
@@ -745,12 +745,13 @@ async def settings_page(request: Request, templates: Jinja2Templates = Depends(g
 
 @router.get("/what-if", response_class=HTMLResponse)
 async def what_if_page(request: Request, templates: Jinja2Templates = Depends(get_templates)) -> HTMLResponse:
-    plan = processor.what_if()
+    plan = get_processor().what_if()
     return templates.TemplateResponse("what_if.html", {"request": request, "plan": plan, "flash": None})
 
 
 @router.post("/what-if/full-sort", response_class=HTMLResponse)
 async def run_full_sort(request: Request, templates: Jinja2Templates = Depends(get_templates)) -> HTMLResponse:
+    processor = get_processor()
     result = processor.full_sort()
     moved = sum(len(uids) for uids in result.get("moves", {}).values())
     plan = processor.what_if()
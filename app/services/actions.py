@@ -1,43 +1,116 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from functools import cache, cached_property
 from secrets import token_urlsafe
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from sqlmodel import select
+from sqlalchemy import case, insert, or_, update
+from sqlmodel import Session, select
 
 from app.core.config import settings
-from app.core.database import get_session
-from app.models import ActionLog, EmailMessage, FolderHint, UndoToken
-from app.services.calendar import CalendarService
+from app.core.database import get_session, upsert
+from app.models import ActionLog, ClassificationCache, EmailMessage, FolderHint, UndoToken
 from app.services.email_client import email_client
 from app.services.notifications import notifier
 from app.services.ollama import classifier
-from app.services.rules import FolderNamer
+
+if TYPE_CHECKING:
+    from app.services.calendar import CalendarService
+    from app.services.rules import FolderNamer
 
 logger = logging.getLogger(__name__)
 
+CLASSIFICATION_CACHE_SIZE = 2048
+LOG_QUEUE_SIZE = 1000
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL_SECONDS = 0.05
+# Seen messages are classified in slices of this many per allowed Ollama request, then acted on.
+CLASSIFY_SLICE_PER_REQUEST = 4
+
+# Sweeps only need the email_actions sub-document, so extract it in SQL rather than
+# hydrating the whole classification blob for every row.
+_EMAIL_ACTIONS = EmailMessage.classification["email_actions"].label("email_actions")
+
+
+def _utcnow() -> datetime:
+    # ClassificationCache.created_at is a naive UTC column.
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class PersistedEmail:
+    """Columns callers need back from an email upsert, without re-reading the row."""
+
+    uid: str
+    session_id: str
+    target_folder: Optional[str]
+    needs_decision: bool
+
 
 class ActionProcessor:
     def __init__(self) -> None:
-        self.calendar_service = CalendarService()
-        self.folder_namer = FolderNamer()
+        # Content key -> (stored at, naive UTC like the table column, classification).
+        self._classification_cache: OrderedDict[str, tuple[datetime, Dict[str, Any]]] = OrderedDict()
+        self._log_queue: Optional[asyncio.Queue[Optional[Dict[str, Any]]]] = None
+        self._log_writer: Optional[asyncio.Task[None]] = None
+
+    def start_log_writer(self) -> None:
+        """Start the background task that batches ActionLog inserts."""
+
+        if self._log_writer is not None:
+            return
+        self._log_queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._log_writer = asyncio.create_task(self._run_log_writer(self._log_queue))
+
+    async def stop_log_writer(self) -> None:
+        """Flush queued ActionLog rows and stop the writer task."""
+
+        queue, task = self._log_queue, self._log_writer
+        if queue is None or task is None:
+            return
+        self._log_queue = None
+        self._log_writer = None
+        await queue.put(None)
+        await task
+
+    @cached_property
+    def calendar_service(self) -> CalendarService:
+        from app.services.calendar import CalendarService
+
+        return CalendarService()
+
+    @cached_property
+    def folder_namer(self) -> FolderNamer:
+        from app.services.rules import FolderNamer
+
+        return FolderNamer()
 
     async def process_seen_messages(self) -> None:
         messages = email_client.fetch_seen_messages()
         if messages:
             logger.info("Processing %s seen messages", len(messages))
-            for message in messages:
-                await self._handle_message(message)
+            # Model calls overlap within a slice, and each slice is acted on before the next is
+            # classified, so a long backlog starts filing straight away.
+            slice_size = max(1, settings.ollama_concurrency) * CLASSIFY_SLICE_PER_REQUEST
+            for start in range(0, len(messages), slice_size):
+                batch = messages[start : start + slice_size]
+                classifications = await self._classify_many(batch)
+                for message, classification in zip(batch, classifications):
+                    await self._handle_message(message, classification)
             logger.debug("Processed %s messages", len(messages))
         await self._process_archive_followups()
 
-    async def _handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
-        context = self._build_prompt_context(message)
-        classification = await classifier.classify(context)
+    async def _handle_message(
+        self, message: Dict[str, Any], classification: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if classification is None:
+            classification = await self._classify(message)
         session_id = self._session_id(message)
         record = self._persist_email(message, classification, session_id)
         session_id = record.session_id or session_id
@@ -65,12 +138,99 @@ class ActionProcessor:
             classification = snapshot.get("classification") if snapshot else None
             session_id = existing_session or self._session_id(message)
             if not classification:
-                context = self._build_prompt_context(message)
-                classification = await classifier.classify(context)
+                classification = await self._classify(message)
             record = self._persist_email(message, classification or {}, session_id)
             session_id = record.session_id or session_id
             await self._apply_actions(message, classification or {}, session_id)
 
+    async def _classify(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self._classify_many([message]))[0]
+
+    async def _classify_many(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        misses: List[tuple[int, str]] = []
+        for index, message in enumerate(messages):
+            key = self._content_key(message)
+            cached = self._cached_classification(key)
+            if cached:
+                results.append(cached)
+            else:
+                results.append({})
+                misses.append((index, key))
+        if not misses:
+            return results
+        classifications = await asyncio.gather(
+            *(self._classify_uncached(key, messages[index]) for index, key in misses)
+        )
+        for (index, _), classification in zip(misses, classifications):
+            results[index] = classification
+        return results
+
+    async def _classify_uncached(self, key: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        classification = await classifier.classify(self._build_prompt_context(message))
+        # Stored as soon as it arrives so an interrupted batch keeps the work already done.
+        # Heuristic fallbacks are not cached so the model gets another chance once it is reachable,
+        # and ambiguous results are not cached so a look-alike message is judged on its own.
+        # Calendar payloads resolve relative dates against the message date, which the key does not
+        # cover, so a recurring "tomorrow at 10am" reminder must not reuse an earlier booking.
+        if (
+            classification
+            and not (classification.get("meta") or {}).get("fallback")
+            and not (classification.get("review") or {}).get("needs_decision")
+            and not classification.get("calendar")
+        ):
+            self._remember_classification(key, classification)
+            self._store_cached_classification(key, classification)
+        return classification
+
+    def _content_key(self, message: Dict[str, Any]) -> str:
+        # Case and whitespace are normalised so resends that differ only in formatting share a key.
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (
+            message.get("subject") or "",
+            message.get("sender") or "",
+            (message.get("body") or "")[:2048],
+        ):
+            digest.update(" ".join(part.split()).casefold().encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _cached_classification(self, key: str) -> Dict[str, Any] | None:
+        # Entries expire so folder choices follow changes to the folder tree and hints.
+        cutoff = _utcnow() - timedelta(hours=settings.classification_cache_ttl_hours)
+        entry = self._classification_cache.get(key) or self._load_cached_classification(key)
+        if not entry or entry[0] < cutoff:
+            self._classification_cache.pop(key, None)
+            return None
+        stored_at, classification = entry
+        self._remember_classification(key, classification, stored_at)
+        return classification
+
+    def _remember_classification(
+        self, key: str, classification: Dict[str, Any], stored_at: Optional[datetime] = None
+    ) -> None:
+        self._classification_cache[key] = (stored_at or _utcnow(), classification)
+        self._classification_cache.move_to_end(key)
+        if len(self._classification_cache) > CLASSIFICATION_CACHE_SIZE:
+            self._classification_cache.popitem(last=False)
+
+    def _load_cached_classification(self, key: str) -> tuple[datetime, Dict[str, Any]] | None:
+        with get_session() as session:
+            entry = session.get(ClassificationCache, key)
+            return (entry.created_at, entry.classification) if entry else None
+
+    def _store_cached_classification(self, key: str, classification: Dict[str, Any]) -> None:
+        now = _utcnow()
+        stmt = upsert(ClassificationCache).values(content_hash=key, classification=classification, created_at=now)
+        with get_session() as session:
+            session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ClassificationCache.content_hash],
+                    set_={"classification": classification, "created_at": now},
+                )
+            )
+            session.commit()
+
     def _build_prompt_context(self, message: Dict[str, Any]) -> Dict[str, Any]:
         with get_session() as session:
             hints = session.exec(
@@ -92,56 +252,74 @@ class ActionProcessor:
 
     def _persist_email(
         self, message: Dict[str, Any], classification: Dict[str, Any], session_id: str
-    ) -> EmailMessage:
-        uid = str(message.get("uid")) if message.get("uid") is not None else None
+    ) -> PersistedEmail:
+        uid = message.get("uid")
         message_id = message.get("message_id")
         now = datetime.now(UTC)
+        review = classification.get("review") or {}
+        action = self._extract_email_action(classification)
+        low_confidence = bool(action) and (action.get("confidence") or 0.0) < 0.4
+        target_folder = None
+        if action and action.get("folder_path"):
+            target_folder = action.get("folder_path")
+        changes = {
+            "classification": classification,
+            "updated_at": now,
+            "last_seen_at": now,
+            "folder": message.get("folder", settings.imap_mailbox),
+            "needs_decision": bool(review.get("needs_decision")) or low_confidence,
+            "session_id": session_id,
+            "target_folder": target_folder,
+        }
         with get_session() as session:
-            db_obj = session.get(EmailMessage, uid) if uid else None
-            if not db_obj and message_id:
-                db_obj = session.exec(
-                    select(EmailMessage).where(EmailMessage.message_id == message_id)
-                ).first()
-                if db_obj and uid:
-                    db_obj.uid = uid
-            if not db_obj:
-                received_at = datetime.fromisoformat(message["received_at"])
-                if received_at.tzinfo:
-                    received_at = received_at.astimezone(UTC)
-                else:
-                    received_at = received_at.replace(tzinfo=UTC)
-                db_obj = EmailMessage(
-                    uid=message["uid"],
-                    message_id=message.get("message_id"),
-                    thread_id=message.get("thread_id"),
-                    subject=message.get("subject", ""),
-                    sender=message.get("sender", ""),
-                    to_recipients=message.get("to", ""),
-                    cc_recipients=message.get("cc", ""),
-                    received_at=received_at,
-                    folder=message.get("folder", settings.imap_mailbox),
-                )
-            db_obj.classification = classification
-            db_obj.updated_at = now
-            db_obj.last_seen_at = now
-            db_obj.folder = message.get("folder", settings.imap_mailbox)
-            meta = classification.get("meta") or {}
-            review = classification.get("review") or {}
-            action = self._extract_email_action(classification)
-            low_confidence = bool(action) and (action.get("confidence") or 0.0) < 0.4
-            db_obj.needs_decision = bool(review.get("needs_decision")) or low_confidence
-            db_obj.session_id = session_id
-            target_folder = None
-            if action and action.get("folder_path"):
-                target_folder = action.get("folder_path")
-            db_obj.target_folder = target_folder
-            session.add(db_obj)
+            if message_id:
+                uid = self._claim_message_id(session, uid, message_id)
+            if not uid:
+                raise ValueError("Cannot persist an email without a UID")
+            stmt = upsert(EmailMessage).values(
+                uid=uid,
+                message_id=message_id,
+                thread_id=message.get("thread_id"),
+                subject=message.get("subject", ""),
+                sender=message.get("sender", ""),
+                to_recipients=message.get("to", ""),
+                cc_recipients=message.get("cc", ""),
+                received_at=self._parse_received_at(message.get("received_at")),
+                **changes,
+            )
+            session.execute(stmt.on_conflict_do_update(index_elements=[EmailMessage.uid], set_=changes))
             session.commit()
-            session.refresh(db_obj)
-            return db_obj
+        return PersistedEmail(
+            uid=uid,
+            session_id=session_id,
+            target_folder=target_folder,
+            needs_decision=changes["needs_decision"],
+        )
+
+    def _claim_message_id(self, session: Session, uid: Optional[str], message_id: str) -> Optional[str]:
+        """Resolve the row for ``uid``, re-keying a row stored under a stale UID for the same Message-Id."""
+
+        conditions = [EmailMessage.message_id == message_id]
+        if uid:
+            conditions.append(EmailMessage.uid == uid)
+        known = session.exec(select(EmailMessage.uid).where(or_(*conditions))).all()
+        if not known or uid in known:
+            return uid
+        if not uid:
+            return known[0]
+        session.execute(update(EmailMessage).where(EmailMessage.uid == known[0]).values(uid=uid))
+        return uid
+
+    def _parse_received_at(self, value: Optional[str]) -> datetime:
+        if not value:
+            return datetime.now(UTC)
+        received_at = datetime.fromisoformat(value)
+        if received_at.tzinfo:
+            return received_at.astimezone(UTC)
+        return received_at.replace(tzinfo=UTC)
 
     def _load_email_snapshot(self, message: Dict[str, Any]) -> Dict[str, Any] | None:
-        uid = str(message.get("uid")) if message.get("uid") is not None else None
+        uid = message.get("uid")
         message_id = message.get("message_id")
         with get_session() as session:
             db_obj = session.get(EmailMessage, uid) if uid else None
@@ -167,33 +345,42 @@ class ActionProcessor:
         review = classification.get("review") or {}
         archive = classification.get("archive") or {}
         meta = classification.get("meta") or {}
-        if action:
-            await self._execute_email_action(message, action, session_id, meta)
-        if review.get("needs_decision"):
-            undo_token = self._ensure_undo_token(session_id)
-            options = review.get("options") or []
-            safe_default = options[0] if options else "Keep in Inbox"
-            reason = review.get("reason") or "Needs your decision"
-            await notifier.send_decision_request(
-                message,
-                reason=reason,
-                safe_default=safe_default,
-                undo_token=undo_token,
-            )
-            self._log_action(
-                session_id,
-                message.get("uid", ""),
-                "decision_request",
-                {"reason": reason, "options": options, "proposed_name": review.get("proposed_name")},
-            )
-        if archive:
-            self._log_action(session_id, message.get("uid", ""), "archive", archive)
-        if meta:
-            self._log_action(session_id, message.get("uid", ""), "meta", meta)
-        await self._handle_calendar(classification.get("calendar"), message, session_id)
+        # Collect every ActionLog row for this message and write them in one transaction.
+        events: List[tuple[str, Dict[str, Any]]] = []
+        try:
+            if action:
+                await self._execute_email_action(message, action, session_id, meta, events)
+            if review.get("needs_decision"):
+                undo_token = self._ensure_undo_token(session_id)
+                options = review.get("options") or []
+                safe_default = options[0] if options else "Keep in Inbox"
+                reason = review.get("reason") or "Needs your decision"
+                await notifier.send_decision_request(
+                    message,
+                    reason=reason,
+                    safe_default=safe_default,
+                    undo_token=undo_token,
+                )
+                events.append(
+                    (
+                        "decision_request",
+                        {"reason": reason, "options": options, "proposed_name": review.get("proposed_name")},
+                    )
+                )
+            if archive:
+                events.append(("archive", archive))
+            if meta:
+                events.append(("meta", meta))
+            await self._handle_calendar(classification.get("calendar"), message, session_id, events)
+        finally:
+            self._log_actions(session_id, message.get("uid", ""), events)
 
     async def _handle_calendar(
-        self, calendar_payload: Dict[str, Any] | None, message: Dict[str, Any], session_id: str
+        self,
+        calendar_payload: Dict[str, Any] | None,
+        message: Dict[str, Any],
+        session_id: str,
+        events: List[tuple[str, Dict[str, Any]]],
     ) -> None:
         if not isinstance(calendar_payload, dict) or not calendar_payload:
             return
@@ -206,12 +393,7 @@ class ActionProcessor:
                 safe_default="Skip calendar update",
                 undo_token=undo_token,
             )
-            self._log_action(
-                session_id,
-                message.get("uid", ""),
-                "calendar_pending",
-                {"confidence": confidence, "payload": calendar_payload},
-            )
+            events.append(("calendar_pending", {"confidence": confidence, "payload": calendar_payload}))
             return
         action_type = calendar_payload.get("action")
         if not action_type:
@@ -226,7 +408,7 @@ class ActionProcessor:
             "thread_id": message.get("thread_id"),
             "provider": message.get("sender"),
             "title": calendar_payload.get("title"),
-            "calendar": calendar_payload.get("target_calendar_hint", CalendarService.HOME),
+            "calendar": calendar_payload.get("target_calendar_hint", self.calendar_service.HOME),
             "starts_at": calendar_payload.get("start"),
             "ends_at": calendar_payload.get("end"),
             "timezone": calendar_payload.get("timezone", settings.timezone),
@@ -237,7 +419,7 @@ class ActionProcessor:
         }
         result = self.calendar_service.apply(payload)
         combined_payload = {**payload, **result}
-        self._log_action(session_id, message.get("uid", ""), "calendar", combined_payload)
+        events.append(("calendar", combined_payload))
         conflict = result.get("conflict")
         if conflict:
             await notifier.send_conflict(conflict)
@@ -246,22 +428,77 @@ class ActionProcessor:
         hint_key = message.get("sender", "")
         if not hint_key:
             return
+        self._persist_folder_hints({(hint_key, folder): confidence})
+
+    def _persist_folder_hints(self, deltas: Dict[tuple[str, str], float]) -> None:
+        """Upsert accumulated (sender, folder) weight deltas in a single statement."""
+
+        if not deltas:
+            return
+        now = datetime.now(UTC)
+        stmt = upsert(FolderHint).values(
+            [
+                {"hint": hint, "folder": folder, "weight": min(weight, 5.0), "last_used_at": now}
+                for (hint, folder), weight in deltas.items()
+            ]
+        )
+        combined = FolderHint.weight + stmt.excluded.weight
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FolderHint.hint, FolderHint.folder],
+            set_={"weight": case((combined > 5.0, 5.0), else_=combined), "last_used_at": now},
+        )
         with get_session() as session:
-            hint = session.exec(
-                select(FolderHint).where(FolderHint.hint == hint_key, FolderHint.folder == folder)
-            ).first()
-            if not hint:
-                hint = FolderHint(hint=hint_key, folder=folder, weight=confidence)
-            else:
-                hint.weight = min(hint.weight + confidence, 5.0)
-                hint.last_used_at = datetime.now(UTC)
-            session.add(hint)
+            session.execute(stmt)
             session.commit()
 
-    def _log_action(self, session_id: str, uid: str, action_type: str, payload: Dict[str, Any]) -> None:
+    def _log_actions(self, session_id: str, uid: str, events: List[tuple[str, Dict[str, Any]]]) -> None:
+        if not events:
+            return
+        now = datetime.now(UTC)
+        rows = [
+            {
+                "session_id": session_id,
+                "email_uid": uid,
+                "action_type": action_type,
+                "payload": payload,
+                "created_at": now,
+            }
+            for action_type, payload in events
+        ]
+        queue = self._log_queue
+        if queue is not None and queue.maxsize - queue.qsize() >= len(rows):
+            for row in rows:
+                queue.put_nowait(row)
+            return
+        self._write_log_rows(rows)
+
+    async def _run_log_writer(self, queue: asyncio.Queue[Optional[Dict[str, Any]]]) -> None:
+        # A None sentinel from stop_log_writer ends the loop once everything before it is written.
+        stopping = False
+        while not stopping:
+            row = await queue.get()
+            batch: List[Dict[str, Any]] = []
+            if row is None:
+                stopping = True
+            else:
+                batch.append(row)
+                await asyncio.sleep(LOG_FLUSH_INTERVAL_SECONDS)
+            while not stopping and len(batch) < LOG_BATCH_SIZE and not queue.empty():
+                row = queue.get_nowait()
+                if row is None:
+                    stopping = True
+                else:
+                    batch.append(row)
+            if not batch:
+                continue
+            try:
+                await asyncio.to_thread(self._write_log_rows, batch)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to write %s action log rows", len(batch))
+
+    def _write_log_rows(self, rows: List[Dict[str, Any]]) -> None:
         with get_session() as session:
-            log_entry = ActionLog(session_id=session_id, email_uid=uid, action_type=action_type, payload=payload)
-            session.add(log_entry)
+            session.execute(insert(ActionLog), rows)
             session.commit()
 
     def _session_id(self, message: Dict[str, Any]) -> str:
@@ -274,12 +511,13 @@ class ActionProcessor:
     def full_sort(self) -> Dict[str, Any]:
         logger.info("Running full sort sweep")
         plan = defaultdict(list)
-        self._apply_archive_followups(plan)
+        hint_deltas: defaultdict[tuple[str, str], float] = defaultdict(float)
+        self._apply_archive_followups(plan, hint_deltas)
         with get_session() as session:
-            emails = session.exec(select(EmailMessage)).all()
-        for email_obj in emails:
-            classification = email_obj.classification or {}
-            action = self._extract_email_action(classification)
+            emails = session.exec(select(EmailMessage.uid, EmailMessage.sender, _EMAIL_ACTIONS)).all()
+        pending: List[tuple[str, str, Optional[str], float]] = []
+        for uid, sender, email_actions in emails:
+            action = self._extract_email_action({"email_actions": email_actions})
             if not action:
                 continue
             destination = action.get("folder_path")
@@ -287,18 +525,20 @@ class ActionProcessor:
                 continue
             if action.get("lane") == "sticky" and not action.get("move_now"):
                 continue
-            email_client.ensure_folder(destination)
-            email_client.move(email_obj.uid, destination)
-            email_client.unflag(email_obj.uid)
-            self._persist_folder_hint(
-                {"sender": email_obj.sender, "folder": email_obj.folder},
-                destination,
-                action.get("confidence") or 0.0,
-            )
-            plan[destination].append(email_obj.uid)
+            pending.append((uid, destination, sender, action.get("confidence") or 0.0))
+        failed = set(email_client.bulk_move([(uid, destination) for uid, destination, _, _ in pending]))
+        for uid, destination, sender, confidence in pending:
+            if uid in failed:
+                continue
+            if sender:
+                hint_deltas[(sender, destination)] += confidence
+            plan[destination].append(uid)
+        self._persist_folder_hints(hint_deltas)
         return {"moves": dict(plan)}
 
-    def _apply_archive_followups(self, plan: defaultdict[str, list[str]]) -> None:
+    def _apply_archive_followups(
+        self, plan: defaultdict[str, list[str]], hint_deltas: defaultdict[tuple[str, str], float]
+    ) -> None:
         archive_folder = settings.imap_archive_mailbox
         if not archive_folder:
             return
@@ -325,12 +565,10 @@ class ActionProcessor:
             except Exception:  # noqa: BLE001
                 logger.exception("Failed to move %s to %s during archive sweep", message.get("uid"), destination)
                 continue
-            self._persist_folder_hint(
-                {"sender": snapshot.get("sender", ""), "folder": message.get("folder", archive_folder)},
-                destination,
-                action.get("confidence") or 0.0,
-            )
-            plan[destination].append(str(message.get("uid")))
+            sender = snapshot.get("sender") or ""
+            if sender:
+                hint_deltas[(sender, destination)] += action.get("confidence") or 0.0
+            plan[destination].append(message["uid"])
             session_id = snapshot.get("session_id") or self._session_id(message)
             self._persist_email(
                 {**message, "folder": destination},
@@ -341,25 +579,38 @@ class ActionProcessor:
     def what_if(self) -> Dict[str, Any]:
         logger.info("Generating what-if plan")
         with get_session() as session:
-            emails = session.exec(select(EmailMessage)).all()
-        plan = []
-        for email_obj in emails:
-            classification = email_obj.classification or {}
-            action = self._extract_email_action(classification)
+            emails = session.exec(select(EmailMessage.uid, EmailMessage.subject, _EMAIL_ACTIONS)).all()
+        # Rows are (lane, uid, ...) tuples so the sort compares natively instead of calling a key
+        # function per comparison; uid is the primary key, so later columns never break ties.
+        rows = []
+        for uid, subject, email_actions in emails:
+            action = self._extract_email_action({"email_actions": email_actions})
             if not action or not action.get("folder_path"):
                 continue
-            plan.append(
-                {
-                    "uid": email_obj.uid,
-                    "subject": email_obj.subject,
-                    "destination": action.get("folder_path"),
-                    "lane": action.get("lane") or "unknown",
-                    "move_now": action.get("move_now"),
-                    "flag": action.get("flag"),
-                    "confidence": action.get("confidence"),
-                }
+            rows.append(
+                (
+                    action.get("lane") or "unknown",
+                    uid,
+                    subject,
+                    action.get("folder_path"),
+                    action.get("move_now"),
+                    action.get("flag"),
+                    action.get("confidence"),
+                )
             )
-        plan.sort(key=lambda item: (item["lane"] or "", item["uid"]))
+        rows.sort()
+        plan = [
+            {
+                "uid": uid,
+                "subject": subject,
+                "destination": destination,
+                "lane": lane,
+                "move_now": move_now,
+                "flag": flag,
+                "confidence": confidence,
+            }
+            for lane, uid, subject, destination, move_now, flag, confidence in rows
+        ]
         return {"plan": plan, "count": len(plan)}
 
     def undo(self, token: str) -> bool:
@@ -418,7 +669,12 @@ class ActionProcessor:
         }
 
     async def _execute_email_action(
-        self, message: Dict[str, Any], action: Dict[str, Any], session_id: str, meta: Dict[str, Any]
+        self,
+        message: Dict[str, Any],
+        action: Dict[str, Any],
+        session_id: str,
+        meta: Dict[str, Any],
+        events: List[tuple[str, Dict[str, Any]]],
     ) -> None:
         uid = message.get("uid")
         if not uid:
@@ -451,37 +707,26 @@ class ActionProcessor:
                 safe_default="Leave in Inbox",
                 undo_token=undo_token,
             )
-            self._log_action(
-                session_id,
-                uid,
-                "decision_request",
-                {"reason": "low_confidence", "confidence": confidence, "destination": destination},
+            events.append(
+                (
+                    "decision_request",
+                    {"reason": "low_confidence", "confidence": confidence, "destination": destination},
+                )
             )
             return
         if not destination:
             logger.warning("No destination folder provided for %s", uid)
             return
-        if action.get("new_folder") or action.get("create_folder"):
+        # move() ensures its destination itself, so only pre-create folders that are not being moved into now.
+        if not move_now and (action.get("new_folder") or action.get("create_folder")):
             email_client.ensure_folder(destination)
-        moved = False
-        if lane == "sticky":
-            if flag:
-                email_client.flag(uid)
-            else:
-                email_client.unflag(uid)
-            if move_now:
-                email_client.ensure_folder(destination)
-                email_client.move(uid, destination)
-                moved = True
+        if flag:
+            email_client.flag(uid)
         else:
-            if flag:
-                email_client.flag(uid)
-            else:
-                email_client.unflag(uid)
-            if move_now:
-                email_client.ensure_folder(destination)
-                email_client.move(uid, destination)
-                moved = True
+            email_client.unflag(uid)
+        if move_now:
+            email_client.move(uid, destination)
+        moved = move_now
         log_payload = {
             "lane": lane,
             "destination": destination,
@@ -496,9 +741,11 @@ class ActionProcessor:
         if action.get("snooze_until"):
             log_payload["snooze_until"] = action.get("snooze_until")
         action_type = "move" if moved else "plan"
-        self._log_action(session_id, uid, action_type, log_payload)
+        events.append((action_type, log_payload))
         if moved:
             self._persist_folder_hint(message, destination, confidence)
 
 
-processor = ActionProcessor()
+@cache
+def get_processor() -> ActionProcessor:
+    return ActionProcessor()
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-import base64
-import email
+import binascii
 import logging
+import quopri
 import re
 import threading
 import time
+from collections import defaultdict
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import cached_property, lru_cache
+from html import unescape
 from email.header import decode_header, make_header
 from email.message import Message
+from email.parser import BytesParser
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -26,6 +31,140 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+IMAP_FETCH_BATCH_SIZE = 100
+IMAP_HEADER_FIELDS = "SUBJECT FROM TO CC MESSAGE-ID REFERENCES IN-REPLY-TO"
+IMAP_METADATA_ITEMS = [
+    "FLAGS",
+    "INTERNALDATE",
+    "BODYSTRUCTURE",
+    f"BODY.PEEK[HEADER.FIELDS ({IMAP_HEADER_FIELDS})]",
+]
+IMAP_TEXT_PART_LIMIT = 65536
+IMAP_TEXT_TOTAL_LIMIT = 1024 * 1024
+IMAP_TEXT_TYPES = {"text/plain", "text/html"}
+IMAP_FLAG_CRITERIA = {"SEEN": b"\\Seen", "FLAGGED": b"\\Flagged"}
+GRAPH_PAGE_CONCURRENCY = 8
+GRAPH_BATCH_SIZE = 20
+# Outlook runs only a few requests per mailbox at once and answers the rest of a $batch with 429,
+# so throttled items are resent after their Retry-After, a bounded number of times.
+GRAPH_BATCH_RETRIES = 6
+GRAPH_RETRY_AFTER_DEFAULT = 1.0
+GRAPH_RETRY_AFTER_MAX = 30.0
+GRAPH_MESSAGE_FIELDS = ",".join(
+    [
+        "id",
+        "subject",
+        "from",
+        "toRecipients",
+        "ccRecipients",
+        "body",
+        "bodyPreview",
+        "receivedDateTime",
+        "isRead",
+        "flag",
+        "conversationId",
+        "internetMessageId",
+        "parentFolderId",
+        "webLink",
+    ]
+)
+GRAPH_BODY_PREFERENCE = 'outlook.body-content-type="text"'
+GRAPH_DELTA_PAGE_SIZE = 100
+GRAPH_DELTA_PREFERENCE = f"{GRAPH_BODY_PREFERENCE}, odata.maxpagesize={GRAPH_DELTA_PAGE_SIZE}"
+# The first delta round reports the whole inbox; like the listing fallback, only this many are processed.
+GRAPH_INITIAL_SEEN_LIMIT = 50
+# Delta rounds only track read state; full messages are fetched for the ids actually returned.
+GRAPH_DELTA_FIELDS = "id,isRead,receivedDateTime"
+# Page fetches and bulk actions run concurrently, so keep enough warm connections for them.
+GRAPH_HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=300.0)
+
+# Only header blocks are parsed here (bodies come from targeted part fetches), so the
+# parser can stop at the end of the headers.
+HEADER_PARSER = BytesParser()
+
+# Script and style blocks are dropped with their contents; every other tag is dropped alone.
+HTML_TAG_PATTERN = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# (section, content type, charset, transfer encoding) of a text part found in BODYSTRUCTURE.
+TextSection = tuple[str, str, str, str]
+# (content type, charset, transfer encoding, encoded payload) of a fetched text part.
+TextPart = tuple[str, str, str, bytes]
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("ascii", errors="ignore")
+    return str(value) if value is not None else ""
+
+
+def _strip_html(html: str) -> str:
+    """Replace HTML tags with spaces and decode entities, leaving the text content in place."""
+
+    # One pass over the markup with no nested quantifiers; a DFA engine such as Hyperscan
+    # would not change the complexity.
+    text = HTML_TAG_PATTERN.sub(" ", html) if "<" in html else html
+    return unescape(text) if "&" in text else text
+
+
+# Encoded subjects and sender names repeat across list mail and notifications.
+@lru_cache(maxsize=4096)
+def _decode_header_value(value: str) -> str:
+    return str(make_header(decode_header(value)))
+
+
+def _decode_transfer(payload: bytes, encoding: str) -> bytes:
+    if encoding == "base64":
+        try:
+            # a2b_base64 skips line breaks itself, so complete parts decode in one pass.
+            return binascii.a2b_base64(payload)
+        except binascii.Error:
+            # Parts are fetched with a byte limit, so drop any trailing partial quantum.
+            cleaned = b"".join(payload.split())
+            return binascii.a2b_base64(cleaned[: len(cleaned) - len(cleaned) % 4])
+    if encoding == "quoted-printable":
+        return quopri.decodestring(payload)
+    return payload
+
+
+# Newsletters and list mail often resend byte-identical parts; keyed on the payload itself.
+@lru_cache(maxsize=256)
+def _decode_part(content_type: str, charset: str, encoding: str, payload: bytes) -> str:
+    decoded = _decode_transfer(payload, encoding)
+    if not decoded:
+        return ""
+    text = decoded.decode(charset, errors="ignore")
+    if content_type == "text/html":
+        text = _strip_html(text)
+    return text
+
+
+def _address_pair(entry: Optional[Dict[str, Any]]) -> tuple[str, str]:
+    email_info = (entry or {}).get("emailAddress") or {}
+    return email_info.get("name") or "", email_info.get("address") or ""
+
+
+# Senders and recipient lists repeat heavily across a mailbox, so formatted strings are cached.
+@lru_cache(maxsize=4096)
+def _format_address(name: str, address: str) -> str:
+    if name and address:
+        return f"{name} <{address}>"
+    return address or name
+
+
+@lru_cache(maxsize=4096)
+def _join_addresses(pairs: tuple[tuple[str, str], ...]) -> str:
+    return ", ".join(filter(None, (_format_address(name, address) for name, address in pairs)))
+
+
+def _section_payload(data: Dict[bytes, Any], section: bytes) -> Optional[bytes]:
+    """Return a FETCH body section, ignoring any ``<origin>`` suffix the server echoes."""
+
+    for key, value in data.items():
+        if isinstance(key, bytes) and key.upper().split(b"<", 1)[0] == section:
+            return value
+    return None
+
 
 def _ensure_directory(path: Path) -> None:
     try:
@@ -39,56 +178,75 @@ class IMAPEmailBackend:
 
     def __init__(self) -> None:
         self._client: Optional[IMAPClient] = None
-        self._folder_cache: Optional[tuple[float, List[str]]] = None
+        # IMAPClient is not thread-safe and the selected folder is connection state, so every
+        # command sequence runs under this lock on the one logged-in connection.
+        self._lock = threading.RLock()
+        # (loaded at, sorted folder names, the same names for membership checks)
+        self._folder_cache: Optional[tuple[float, List[str], frozenset[str]]] = None
+        # Parsed messages per (folder, search), valid for a single UIDVALIDITY: IMAP never
+        # reuses a UID within one validity epoch, so a cached parse never has to be refreshed.
+        # The mailbox state recorded alongside lets an unchanged folder skip the SEARCH as well.
+        self._message_cache: Dict[
+            tuple[str, tuple[str, ...]], tuple[Any, Optional[tuple[Any, ...]], Dict[int, Dict[str, Any]]]
+        ] = {}
 
     def connect(self) -> IMAPClient:
-        if self._client is None:
-            logger.info(
-                "Connecting to IMAP %s using %s (%s auth)",
-                settings.imap_host,
-                settings.imap_encryption,
-                settings.imap_auth_type,
-            )
-            use_ssl = settings.imap_encryption == "SSL"
-            client = IMAPClient(
-                settings.imap_host,
-                port=settings.imap_port,
-                ssl=use_ssl,
-            )
-            if settings.imap_encryption == "STARTTLS":
-                try:
-                    client.starttls()
-                except Exception:  # noqa: BLE001
-                    logger.exception("IMAP STARTTLS negotiation failed")
-                    try:
-                        client.shutdown()
-                    except Exception:  # noqa: BLE001
-                        logger.debug(
-                            "IMAP client shutdown after STARTTLS failure raised but was ignored",
-                            exc_info=True,
-                        )
-                    self._client = None
-                    raise
+        with self._lock:
+            if self._client is None:
+                self._client = self._open_client()
+            return self._client
+
+    def _open_client(self) -> IMAPClient:
+        logger.info(
+            "Connecting to IMAP %s using %s (%s auth)",
+            settings.imap_host,
+            settings.imap_encryption,
+            settings.imap_auth_type,
+        )
+        use_ssl = settings.imap_encryption == "SSL"
+        client = IMAPClient(
+            settings.imap_host,
+            port=settings.imap_port,
+            ssl=use_ssl,
+        )
+        if settings.imap_encryption == "STARTTLS":
             try:
-                if settings.imap_auth_type == "XOAUTH2":
-                    token = settings.imap_oauth2_token
-                    if not token:
-                        raise ValueError(
-                            "IMAP_OAUTH2_TOKEN must be configured when IMAP_AUTH_TYPE=XOAUTH2"
-                        )
-                    client.oauth2_login(settings.imap_username, token)
-                else:
-                    client.login(settings.imap_username, settings.imap_password)
+                client.starttls()
             except Exception:  # noqa: BLE001
-                logger.exception("IMAP login failed")
+                logger.exception("IMAP STARTTLS negotiation failed")
                 try:
                     client.shutdown()
                 except Exception:  # noqa: BLE001
-                    logger.debug("IMAP client shutdown raised but was ignored", exc_info=True)
-                self._client = None
+                    logger.debug(
+                        "IMAP client shutdown after STARTTLS failure raised but was ignored",
+                        exc_info=True,
+                    )
                 raise
-            self._client = client
-        return self._client
+        try:
+            if settings.imap_auth_type == "XOAUTH2":
+                token = settings.imap_oauth2_token
+                if not token:
+                    raise ValueError(
+                        "IMAP_OAUTH2_TOKEN must be configured when IMAP_AUTH_TYPE=XOAUTH2"
+                    )
+                client.oauth2_login(settings.imap_username, token)
+            else:
+                client.login(settings.imap_username, settings.imap_password)
+        except Exception:  # noqa: BLE001
+            logger.exception("IMAP login failed")
+            try:
+                client.shutdown()
+            except Exception:  # noqa: BLE001
+                logger.debug("IMAP client shutdown raised but was ignored", exc_info=True)
+            raise
+        if client.has_capability("CONDSTORE") and client.has_capability("ENABLE"):
+            # Enabling CONDSTORE makes SELECT report HIGHESTMODSEQ, which changes on any flag
+            # update in the folder.
+            try:
+                client.enable("CONDSTORE")
+            except IMAPClientError:
+                logger.debug("IMAP server refused ENABLE CONDSTORE", exc_info=True)
+        return client
 
     def fetch_seen_messages(self) -> List[Dict[str, Any]]:
         return self._fetch_messages(settings.imap_mailbox, ["SEEN"])
@@ -98,151 +256,329 @@ class IMAPEmailBackend:
         return self._fetch_messages(folder_name, ["FLAGGED"])
 
     def fetch_latest_message(self) -> Optional[Dict[str, Any]]:
-        client = self.connect()
-        client.select_folder(settings.imap_mailbox)
-        uids = client.search(["ALL"])
-        if not uids:
-            return None
-        latest_uid = max(uids)
-        response = client.fetch([latest_uid], ["RFC822", "FLAGS", "ENVELOPE", "BODYSTRUCTURE"])
-        data = response.get(latest_uid)
-        if not data:
-            return None
-        raw_message: bytes = data.get(b"RFC822", b"")
-        msg = email.message_from_bytes(raw_message)
-        return self._parse_message(latest_uid, msg, data, settings.imap_mailbox)
+        with self._lock:
+            client = self.connect()
+            mailbox = settings.imap_mailbox
+            client.select_folder(mailbox)
+            uids = client.search(["ALL"])
+            if not uids:
+                return None
+            latest_uid = max(uids)
+            return self._fetch_parsed(client, [latest_uid], mailbox).get(latest_uid)
 
     def move(self, uid: int | str, destination: str) -> None:
-        client = self.connect()
-        logger.info("Moving message %s -> %s", uid, destination)
-        self.ensure_folder(destination)
-        client.move(uid, destination)
+        with self._lock:
+            client = self.connect()
+            logger.info("Moving message %s -> %s", uid, destination)
+            self.ensure_folder(destination)
+            client.move(uid, destination)
 
     def flag(self, uid: int | str) -> None:
-        client = self.connect()
-        client.add_flags(uid, ["\\Flagged"])
+        with self._lock:
+            client = self.connect()
+            client.add_flags(uid, ["\\Flagged"])
 
     def unflag(self, uid: int | str) -> None:
-        client = self.connect()
-        client.remove_flags(uid, ["\\Flagged"])
+        with self._lock:
+            client = self.connect()
+            client.remove_flags(uid, ["\\Flagged"])
+
+    def bulk_move(self, moves: List[tuple[str, str]]) -> List[str]:
+        """Unflag and move messages with one STORE and one MOVE per destination and batch.
+
+        Returns the UIDs that could not be moved.
+        """
+
+        if not moves:
+            return []
+        with self._lock:
+            client = self.connect()
+            by_destination: Dict[str, List[str]] = defaultdict(list)
+            for uid, destination in moves:
+                by_destination[destination].append(uid)
+            failed: List[str] = []
+            for destination, uids in by_destination.items():
+                logger.info("Moving %d messages -> %s", len(uids), destination)
+                try:
+                    self.ensure_folder(destination)
+                except IMAPClientError:
+                    logger.exception("Failed to create folder %s", destination)
+                    failed.extend(uids)
+                    continue
+                # UID sets are bounded like fetches so the command stays under server line limits.
+                for start in range(0, len(uids), IMAP_FETCH_BATCH_SIZE):
+                    batch = uids[start : start + IMAP_FETCH_BATCH_SIZE]
+                    try:
+                        client.remove_flags(batch, ["\\Flagged"])
+                        client.move(batch, destination)
+                    except IMAPClientError:
+                        logger.exception("Failed to move messages to %s", destination)
+                        failed.extend(batch)
+            return failed
 
     def ensure_folder(self, folder: str) -> None:
-        client = self.connect()
-        existing = {item[2] for item in client.list_folders()}
-        if folder in existing:
-            return
-        parts = folder.split("/")
-        for i in range(1, len(parts) + 1):
-            subfolder = "/".join(parts[:i])
-            if subfolder not in existing:
-                logger.info("Creating folder %s", subfolder)
-                client.create_folder(subfolder)
-                existing.add(subfolder)
-        self._folder_cache = None
+        with self._lock:
+            folders = self.list_folders()
+            timestamp, _, existing = self._folder_cache or (time.monotonic(), folders, frozenset(folders))
+            if folder in existing:
+                return
+            client = self.connect()
+            parts = folder.split("/")
+            for i in range(1, len(parts) + 1):
+                subfolder = "/".join(parts[:i])
+                if subfolder not in existing:
+                    logger.info("Creating folder %s", subfolder)
+                    try:
+                        client.create_folder(subfolder)
+                    except IMAPClientError:
+                        # The cached listing may predate a folder created elsewhere.
+                        if subfolder not in self.list_folders(refresh=True):
+                            raise
+                    existing = existing | {subfolder}
+            # Record what was created rather than dropping the cache, so the next move skips LIST.
+            self._folder_cache = (timestamp, sorted(existing), existing)
 
     def list_folders(self, refresh: bool = False) -> List[str]:
-        if self._folder_cache and not refresh:
-            timestamp, cached = self._folder_cache
-            if time.monotonic() - timestamp < 300:
-                return cached
-        client = self.connect()
-        folders = sorted(item[2] for item in client.list_folders())
-        self._folder_cache = (time.monotonic(), folders)
-        return folders
+        with self._lock:
+            if self._folder_cache and not refresh:
+                timestamp, cached, _ = self._folder_cache
+                if time.monotonic() - timestamp < 300:
+                    return cached
+            client = self.connect()
+            folders = sorted(item[2] for item in client.list_folders())
+            self._folder_cache = (time.monotonic(), folders, frozenset(folders))
+            return folders
 
     def diagnostics(self) -> Dict[str, Any]:
-        client = self.connect()
-        state = getattr(getattr(client, "_imap", None), "state", None)
-        if hasattr(state, "name"):
-            state_name = state.name  # type: ignore[attr-defined]
-        else:
-            state_name = str(state) if state else "unknown"
+        with self._lock:
+            client = self.connect()
+            state = getattr(getattr(client, "_imap", None), "state", None)
+            if hasattr(state, "name"):
+                state_name = state.name  # type: ignore[attr-defined]
+            else:
+                state_name = str(state) if state else "unknown"
 
-        capabilities: List[str] = []
-        capabilities_error: Optional[str] = None
-        try:
-            raw_caps = client.capabilities() or []
-            capabilities = sorted(
-                cap.decode() if isinstance(cap, bytes) else str(cap)
-                for cap in raw_caps
-            )
-        except Exception as exc:  # noqa: BLE001
-            capabilities_error = str(exc)
+            capabilities: List[str] = []
+            capabilities_error: Optional[str] = None
+            try:
+                raw_caps = client.capabilities() or []
+                capabilities = sorted(
+                    cap.decode() if isinstance(cap, bytes) else str(cap)
+                    for cap in raw_caps
+                )
+            except Exception as exc:  # noqa: BLE001
+                capabilities_error = str(exc)
 
-        mailbox_status: Dict[str, Any] = {}
-        mailbox_error: Optional[str] = None
-        try:
-            status = client.folder_status(
-                settings.imap_mailbox,
-                what=("MESSAGES", "RECENT", "UNSEEN"),
-            )
-            mailbox_status = {
-                (key.decode() if isinstance(key, bytes) else str(key)).lower(): int(value)
-                for key, value in status.items()
-            }
-        except IMAPClientError as exc:
-            mailbox_error = str(exc)
-        except Exception as exc:  # noqa: BLE001
-            mailbox_error = str(exc)
+            mailbox_status: Dict[str, Any] = {}
+            mailbox_error: Optional[str] = None
+            try:
+                status = client.folder_status(
+                    settings.imap_mailbox,
+                    what=("MESSAGES", "RECENT", "UNSEEN"),
+                )
+                mailbox_status = {
+                    (key.decode() if isinstance(key, bytes) else str(key)).lower(): int(value)
+                    for key, value in status.items()
+                }
+            except IMAPClientError as exc:
+                mailbox_error = str(exc)
+            except Exception as exc:  # noqa: BLE001
+                mailbox_error = str(exc)
 
-        try:
-            selected = client.get_selected_folder()
-            if isinstance(selected, bytes):
-                selected_folder = selected.decode()
-            else:
-                selected_folder = selected
-        except Exception:  # noqa: BLE001
-            selected_folder = None
+            try:
+                selected = client.get_selected_folder()
+                if isinstance(selected, bytes):
+                    selected_folder = selected.decode()
+                else:
+                    selected_folder = selected
+            except Exception:  # noqa: BLE001
+                selected_folder = None
 
-        return {
-            "ok": mailbox_error is None,
-            "state": state_name,
-            "selected_folder": selected_folder,
-            "server": f"{settings.imap_host}:{settings.imap_port}",
-            "encryption": settings.imap_encryption,
-            "auth_type": settings.imap_auth_type,
-            "ssl": settings.imap_encryption == "SSL",
-            "mailbox": settings.imap_mailbox,
-            "mailbox_status": mailbox_status,
-            "mailbox_error": mailbox_error,
-            "capabilities": capabilities,
-            "capabilities_error": capabilities_error,
-        }
+            return {
+                "ok": mailbox_error is None,
+                "state": state_name,
+                "selected_folder": selected_folder,
+                "server": f"{settings.imap_host}:{settings.imap_port}",
+                "encryption": settings.imap_encryption,
+                "auth_type": settings.imap_auth_type,
+                "ssl": settings.imap_encryption == "SSL",
+                "mailbox": settings.imap_mailbox,
+                "mailbox_status": mailbox_status,
+                "mailbox_error": mailbox_error,
+                "capabilities": capabilities,
+                "capabilities_error": capabilities_error,
+            }
 
     def reset_connection(self) -> None:
-        if self._client is not None:
-            try:
-                self._client.logout()
-            except Exception:  # noqa: BLE001
+        with self._lock:
+            if self._client is not None:
                 try:
-                    self._client.shutdown()
+                    self._client.logout()
                 except Exception:  # noqa: BLE001
-                    logger.debug("IMAP client shutdown during reset raised", exc_info=True)
-            finally:
-                self._client = None
-        self._folder_cache = None
+                    try:
+                        self._client.shutdown()
+                    except Exception:  # noqa: BLE001
+                        logger.debug("IMAP client shutdown during reset raised", exc_info=True)
+                finally:
+                    self._client = None
+            self._folder_cache = None
 
     def _fetch_messages(self, folder: str, criteria: List[str]) -> List[Dict[str, Any]]:
-        client = self.connect()
+        with self._lock:
+            client = self.connect()
+            try:
+                selected = client.select_folder(folder)
+            except IMAPClientError:
+                logger.warning("Folder %s is unavailable for fetch", folder, exc_info=True)
+                return []
+            selected = selected if isinstance(selected, dict) else {}
+            uid_validity = selected.get(b"UIDVALIDITY")
+            mailbox_state = self._mailbox_state(selected)
+            cache_key = (folder, tuple(criteria))
+            cached_validity, cached_state, cached = self._message_cache.get(cache_key, (None, None, {}))
+            if uid_validity is None or cached_validity != uid_validity:
+                cached = {}
+            elif mailbox_state is not None and mailbox_state == cached_state:
+                return [dict(message) for message in cached.values()]
+            uids = self._matching_uids(client, criteria, selected, warm=bool(cached))
+            missing = [uid for uid in uids if uid not in cached]
+            cached.update(self._fetch_missing(client, missing, folder))
+            # Only keep UIDs that still match the search so deleted or moved mail drops out.
+            current = {uid: cached[uid] for uid in uids if uid in cached}
+            if uid_validity is not None:
+                self._message_cache[cache_key] = (uid_validity, mailbox_state, current)
+            return [dict(message) for message in current.values()]
+
+    def _matching_uids(
+        self, client: IMAPClient, criteria: List[str], selected: Dict[bytes, Any], warm: bool
+    ) -> List[int]:
+        flag = IMAP_FLAG_CRITERIA.get(criteria[0]) if len(criteria) == 1 else None
+        if not warm or flag is None:
+            return client.search(criteria)
+        if selected.get(b"EXISTS") == 0:
+            return []
+        # With a warm cache only the flags are needed to tell which UIDs still match; FLAGS are
+        # small and served from the index, which saves the server-side SEARCH round trip.
+        response = client.fetch("1:*", ["FLAGS"])
+        return sorted(uid for uid, data in response.items() if flag in data.get(b"FLAGS", ()))
+
+    def _mailbox_state(self, selected: Dict[bytes, Any]) -> Optional[tuple[Any, ...]]:
+        """Summarise a SELECT response so an unchanged folder can be recognised without a SEARCH."""
+
+        highest_modseq = selected.get(b"HIGHESTMODSEQ")
+        if highest_modseq is None:
+            return None
+        # New mail moves UIDNEXT and expunges move EXISTS even on servers that only bump the
+        # mod-sequence for flag changes.
+        return (highest_modseq, selected.get(b"UIDNEXT"), selected.get(b"EXISTS"))
+
+    def _fetch_missing(self, client: IMAPClient, uids: List[int], folder: str) -> Dict[int, Dict[str, Any]]:
+        batches = [uids[start : start + IMAP_FETCH_BATCH_SIZE] for start in range(0, len(uids), IMAP_FETCH_BATCH_SIZE)]
+        workers = min(settings.imap_fetch_workers, len(batches))
+        if workers <= 1:
+            return self._fetch_parsed(client, uids, folder)
+        # imapclient waits for each FETCH to complete, so a large backlog is split across extra
+        # sessions to overlap the round trips; the shared connection stays free of this work.
+        shares = [[uid for batch in batches[index::workers] for uid in batch] for index in range(workers)]
+        parsed: Dict[int, Dict[str, Any]] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for result in pool.map(lambda share: self._fetch_with_worker(share, folder), shares):
+                    parsed.update(result)
+        except (IMAPClientError, OSError):
+            logger.warning("Parallel IMAP fetch failed; fetching on the shared connection", exc_info=True)
+            return self._fetch_parsed(client, uids, folder)
+        return parsed
+
+    def _fetch_with_worker(self, uids: List[int], folder: str) -> Dict[int, Dict[str, Any]]:
+        client = self._open_client()
         try:
-            client.select_folder(folder)
-        except IMAPClientError:
-            logger.warning("Folder %s is unavailable for fetch", folder, exc_info=True)
+            client.select_folder(folder, readonly=True)
+            return self._fetch_parsed(client, uids, folder)
+        finally:
+            try:
+                client.logout()
+            except Exception:  # noqa: BLE001
+                logger.debug("IMAP worker logout raised but was ignored", exc_info=True)
+
+    def _fetch_parsed(self, client: IMAPClient, uids: List[int], folder: str) -> Dict[int, Dict[str, Any]]:
+        """Fetch headers and text parts for ``uids`` without downloading full RFC822 bodies."""
+
+        parsed: Dict[int, Dict[str, Any]] = {}
+        # Fetch in bounded batches so large mailboxes stay under server command-length limits
+        # and each batch's bytes can be released before the next round trip.
+        for start in range(0, len(uids), IMAP_FETCH_BATCH_SIZE):
+            batch = uids[start : start + IMAP_FETCH_BATCH_SIZE]
+            response = client.fetch(batch, IMAP_METADATA_ITEMS)
+            sections = {uid: self._text_sections(data.get(b"BODYSTRUCTURE")) for uid, data in response.items()}
+            bodies = self._fetch_text_parts(client, sections)
+            for uid, data in response.items():
+                header_bytes = next(
+                    (
+                        value
+                        for key, value in data.items()
+                        if isinstance(key, bytes) and key.upper().startswith(b"BODY[HEADER")
+                    ),
+                    None,
+                )
+                headers = HEADER_PARSER.parsebytes(header_bytes or b"", headersonly=True)
+                parsed[uid] = self._parse_message(uid, headers, data, folder, bodies.get(uid, []))
+        return parsed
+
+    def _text_sections(self, structure: Any, prefix: str = "") -> List[TextSection]:
+        """Walk BODYSTRUCTURE and return the section numbers of text/plain and text/html parts."""
+
+        if not structure:
             return []
-        uids = client.search(criteria)
-        if not uids:
+        if isinstance(structure[0], list):
+            sections: List[TextSection] = []
+            for index, part in enumerate(structure[0], start=1):
+                sections.extend(self._text_sections(part, f"{prefix}{index}."))
+            # Alternatives carry the same content twice; prefer the plain copy so the HTML one is
+            # neither fetched nor stripped.
+            subtype = _as_text(structure[1] if len(structure) > 1 else None).lower()
+            if subtype == "alternative" and any(section[1] == "text/plain" for section in sections):
+                sections = [section for section in sections if section[1] != "text/html"]
+            return sections
+        content_type = f"{_as_text(structure[0])}/{_as_text(structure[1])}".lower()
+        if content_type not in IMAP_TEXT_TYPES:
             return []
-        response = client.fetch(uids, ["RFC822", "FLAGS", "ENVELOPE", "BODYSTRUCTURE"])
-        messages: List[Dict[str, Any]] = []
-        for uid, data in response.items():
-            raw_message: bytes = data.get(b"RFC822", b"")
-            msg = email.message_from_bytes(raw_message)
-            parsed = self._parse_message(uid, msg, data, folder)
-            messages.append(parsed)
-        return messages
+        params = structure[2] or ()
+        charset = "utf-8"
+        for index in range(0, len(params) - 1, 2):
+            if _as_text(params[index]).lower() == "charset":
+                charset = _as_text(params[index + 1]) or charset
+        encoding = _as_text(structure[5] if len(structure) > 5 else None).lower() or "7bit"
+        # A single-part message exposes its body as section 1.
+        return [(prefix.rstrip(".") or "1", content_type, charset, encoding)]
+
+    def _fetch_text_parts(
+        self, client: IMAPClient, sections: Dict[int, List[TextSection]]
+    ) -> Dict[int, List[TextPart]]:
+        # Messages sharing a part layout are fetched together, so a batch usually needs one or
+        # two FETCH commands instead of one per message.
+        groups: Dict[tuple[str, ...], List[int]] = defaultdict(list)
+        for uid, parts in sections.items():
+            if parts:
+                groups[tuple(part[0] for part in parts)].append(uid)
+        bodies: Dict[int, List[TextPart]] = {}
+        for numbers, uids in groups.items():
+            items = [f"BODY.PEEK[{number}]<0.{IMAP_TEXT_PART_LIMIT}>" for number in numbers]
+            response = client.fetch(uids, items)
+            for uid, data in response.items():
+                bodies[uid] = [
+                    (content_type, charset, encoding, _section_payload(data, f"BODY[{number}]".encode()) or b"")
+                    for number, content_type, charset, encoding in sections.get(uid, [])
+                ]
+        return bodies
 
     def _parse_message(
-        self, uid: int, message: Message, metadata: Dict[bytes, Any], folder: str
+        self,
+        uid: int,
+        message: Message,
+        metadata: Dict[bytes, Any],
+        folder: str,
+        parts: List[TextPart],
     ) -> Dict[str, Any]:
         subject = self._decode(message.get("Subject", ""))
         sender = self._decode(message.get("From", ""))
@@ -250,12 +586,14 @@ class IMAPEmailBackend:
         cc_recipients = self._decode(message.get("Cc", ""))
         message_id = message.get("Message-Id")
         thread_id = self._thread_id(message)
-        body_text = self._extract_text(message)
+        body_text = self._extract_text(parts)
         received = metadata.get(b"INTERNALDATE")
         if isinstance(received, datetime):
             received_at = received.astimezone(timezone.utc)
         else:
             received_at = datetime.now(timezone.utc)
+        # UIDs leave the backend as strings: Exchange message ids are opaque, so the rest of
+        # the app keys on the string form and never has to re-coerce it.
         return {
             "uid": str(uid),
             "subject": subject,
@@ -266,46 +604,44 @@ class IMAPEmailBackend:
             "thread_id": thread_id,
             "body": body_text,
             "received_at": received_at.isoformat(),
-            "raw": message.as_string(),
             "folder": folder,
         }
 
     def _decode(self, value: str) -> str:
         if not value:
             return ""
+        if isinstance(value, str):
+            if "=?" not in value:
+                # No RFC 2047 encoded words, so decoding would return the value unchanged.
+                return value
+            return _decode_header_value(value)
         return str(make_header(decode_header(value)))
 
     def _thread_id(self, message: Message) -> str:
         references = message.get_all("References", [])
         in_reply_to = message.get("In-Reply-To")
-        raw = " ".join(references + ([in_reply_to] if in_reply_to else []))
-        return re.sub(r"\s+", " ", raw.strip()) or (message.get("Message-Id") or "")
+        raw = " ".join(references + ([in_reply_to] if in_reply_to else [])).strip()
+        # A single Message-ID has no whitespace to collapse, so the regex is only needed for chains.
+        if any(char in raw for char in " \t\r\n"):
+            raw = WHITESPACE_PATTERN.sub(" ", raw)
+        return raw or (message.get("Message-Id") or "")
 
-    def _extract_text(self, message: Message) -> str:
-        if message.is_multipart():
-            parts: Iterable[Message] = message.walk()
-        else:
-            parts = [message]
+    def _extract_text(self, parts: Iterable[TextPart]) -> str:
         chunks: List[str] = []
-        for part in parts:
-            content_type = part.get_content_type()
-            if content_type in {"text/plain", "text/html"}:
-                try:
-                    payload = part.get_payload(decode=True)
-                    if not payload:
-                        continue
-                    charset = part.get_content_charset() or "utf-8"
-                    text = payload.decode(charset, errors="ignore")
-                    if content_type == "text/html":
-                        text = self._strip_html(text)
-                    chunks.append(text)
-                except Exception:  # noqa: BLE001
-                    logger.exception("Failed to decode message part")
+        total = 0
+        for content_type, charset, encoding, payload in parts:
+            if total >= IMAP_TEXT_TOTAL_LIMIT:
+                break
+            try:
+                text = _decode_part(content_type, charset, encoding, payload)
+                if not text:
+                    continue
+                chunks.append(text)
+                total += len(text)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to decode message part")
         return "\n".join(chunks)
 
-    def _strip_html(self, html: str) -> str:
-        return re.sub(r"<[^>]+>", " ", html)
-
 
 class ExchangeAuthManager:
     """Handles delegated Exchange authentication flows for Microsoft accounts."""
@@ -420,8 +756,21 @@ class ExchangeGraphBackend:
 
     def __init__(self) -> None:
         self._token: Optional[tuple[str, float]] = None
-        self._http = httpx.Client(timeout=settings.exchange_timeout)
-        self._folder_cache: Optional[tuple[float, Dict[str, Dict[str, Optional[str]]]]] = None
+        self._header_cache: Optional[tuple[str, Dict[str, str]]] = None
+        self._http = self._build_http_client()
+        # (loaded at, path -> folder info, folder id -> path)
+        self._folder_cache: Optional[
+            tuple[float, Dict[str, Dict[str, Optional[str]]], Dict[str, str]]
+        ] = None
+        self._folder_ids: Dict[str, Dict[str, Optional[str]]] = {}
+        self._folder_delta_link: Optional[str] = None
+        self._folder_lock = threading.RLock()
+        # Ids of read inbox messages, kept current through messages/delta so only new ones are returned.
+        # Held in memory only: a restart resyncs from scratch, and an id counts as seen once it has
+        # been returned, so a message whose processing fails is only offered again after it is marked
+        # unread and read again, or leaves the inbox and comes back.
+        self._seen_ids: set[str] = set()
+        self._message_delta_link: Optional[str] = None
         self._user_cache: Optional[Dict[str, Any]] = None
         self._auth = exchange_auth_manager
         self._account: Optional[Dict[str, Any]] = None
@@ -431,6 +780,9 @@ class ExchangeGraphBackend:
         return True
 
     def fetch_seen_messages(self) -> List[Dict[str, Any]]:
+        messages = self._sync_message_delta()
+        if messages is not None:
+            return messages
         messages = self._get_messages(filter="isRead eq true", top=50)
         return [self._parse_message(item) for item in messages]
 
@@ -441,7 +793,7 @@ class ExchangeGraphBackend:
         return self._parse_message(items[0])
 
     def move(self, uid: int | str, destination: str) -> None:
-        folder = self._ensure_folder(destination)
+        folder = self.ensure_folder(destination)
         path = f"{self._user_prefix}/messages/{uid}/move"
         payload = {"destinationId": folder["id"]}
         self._request("POST", path, json=payload)
@@ -454,32 +806,73 @@ class ExchangeGraphBackend:
         path = f"{self._user_prefix}/messages/{uid}"
         self._request("PATCH", path, json={"flag": {"flagStatus": "notFlagged"}})
 
+    def bulk_move(self, moves: List[tuple[str, str]]) -> List[str]:
+        """Unflag and move messages through Graph ``$batch`` requests.
+
+        Returns the message ids that could not be moved.
+        """
+
+        if not moves:
+            return []
+        prefix = self._user_prefix
+        folder_ids = {destination: self.ensure_folder(destination)["id"] for destination in {d for _, d in moves}}
+        # Unflag first: a move gives the message a new id in the destination folder.
+        unflagged = self._batch(
+            [
+                {"method": "PATCH", "url": f"{prefix}/messages/{uid}", "body": {"flag": {"flagStatus": "notFlagged"}}}
+                for uid, _ in moves
+            ]
+        )
+        for (uid, _), response in zip(moves, unflagged):
+            if response.get("status", 500) >= 400:
+                logger.warning("Failed to unflag %s: %s", uid, response.get("body"))
+        moved = self._batch(
+            [
+                {
+                    "method": "POST",
+                    "url": f"{prefix}/messages/{uid}/move",
+                    "body": {"destinationId": folder_ids[destination]},
+                }
+                for uid, destination in moves
+            ]
+        )
+        failed: List[str] = []
+        for (uid, destination), response in zip(moves, moved):
+            if response.get("status", 500) >= 400:
+                logger.warning("Failed to move %s to %s: %s", uid, destination, response.get("body"))
+                failed.append(uid)
+        return failed
+
     def ensure_folder(self, folder: str) -> Dict[str, Any]:
         parts = [part.strip() for part in folder.split("/") if part.strip()]
         if not parts:
             raise ValueError("Folder path must not be empty")
 
-        folders = self._load_folders()
-        current_path = ""
-        parent_id: Optional[str] = None
-        for part in parts:
-            current_path = f"{current_path}/{part}".strip("/")
-            existing = folders.get(current_path)
-            if existing:
-                parent_id = existing["id"]
-                continue
-            if parent_id:
-                path = f"{self._user_prefix}/mailFolders/{parent_id}/childFolders"
-            else:
-                path = f"{self._user_prefix}/mailFolders"
-            created = self._request("POST", path, json={"displayName": part}) or {}
-            folder_id = created.get("id")
-            if not folder_id:
-                raise RuntimeError("Failed to create Exchange folder")
-            folders[current_path] = {"id": folder_id, "name": part, "parent": parent_id}
-            parent_id = folder_id
-        self._folder_cache = (time.monotonic(), folders)
-        return folders[current_path]
+        with self._folder_lock:
+            folders = self._load_folders()
+            current_path = ""
+            parent_id: Optional[str] = None
+            for part in parts:
+                current_path = f"{current_path}/{part}".strip("/")
+                existing = folders.get(current_path)
+                if existing:
+                    parent_id = existing["id"]
+                    continue
+                if parent_id:
+                    path = f"{self._user_prefix}/mailFolders/{parent_id}/childFolders"
+                else:
+                    path = f"{self._user_prefix}/mailFolders"
+                created = self._request("POST", path, json={"displayName": part}) or {}
+                folder_id = created.get("id")
+                if not folder_id:
+                    raise RuntimeError("Failed to create Exchange folder")
+                # Merge the new folder into the cached maps instead of discarding them.
+                info = {"id": folder_id, "name": part, "parent": parent_id}
+                folders[current_path] = info
+                self._folder_ids[folder_id] = info
+                parent_id = folder_id
+            self._store_folders(folders)
+            return folders[current_path]
 
     def list_folders(self, refresh: bool = False) -> List[str]:
         folders = self._load_folders(force=refresh)
@@ -533,13 +926,24 @@ class ExchangeGraphBackend:
 
     def reset_connection(self) -> None:
         self._token = None
+        self._header_cache = None
         self._folder_cache = None
+        self._folder_ids = {}
+        self._folder_delta_link = None
+        self._seen_ids = set()
+        self._message_delta_link = None
+        self.__dict__.pop("_user_prefix", None)
         self._user_cache = None
         self._account = None
         try:
-            self._http.close()
+            if not self._http.is_closed:
+                self._http.close()
         finally:
-            self._http = httpx.Client(timeout=settings.exchange_timeout)
+            self._http = self._build_http_client()
+
+    def _build_http_client(self) -> httpx.Client:
+        # HTTP/2 multiplexes the concurrent Graph calls over one TLS connection.
+        return httpx.Client(http2=True, timeout=settings.exchange_timeout, limits=GRAPH_HTTP_LIMITS)
 
     def _ensure_token(self) -> str:
         now = time.monotonic()
@@ -577,14 +981,20 @@ class ExchangeGraphBackend:
         return token
 
     def _headers(self) -> Dict[str, str]:
+        # Reuse the header dict for as long as the same access token is in use.
         token = self._ensure_token()
-        return {
+        cached = self._header_cache
+        if cached and cached[0] is token:
+            return cached[1]
+        headers = {
             "Authorization": f"Bearer {token}",
             "Accept": "application/json",
-            "Prefer": 'outlook.body-content-type="text"',
+            "Prefer": GRAPH_BODY_PREFERENCE,
         }
+        self._header_cache = (token, headers)
+        return headers
 
-    @property
+    @cached_property
     def _user_prefix(self) -> str:
         if settings.exchange_login_mode == "DELEGATED" and not settings.exchange_user_id:
             return "/me"
@@ -618,9 +1028,13 @@ class ExchangeGraphBackend:
         params: Optional[Dict[str, Any]] = None,
         json: Optional[Dict[str, Any]] = None,
         absolute: bool = False,
+        prefer: Optional[str] = None,
     ) -> Dict[str, Any]:
         url = path if absolute else f"{self.GRAPH_BASE}{path}"
-        response = self._http.request(method, url, params=params, json=json, headers=self._headers())
+        headers = self._headers()
+        if prefer:
+            headers = {**headers, "Prefer": prefer}
+        response = self._http.request(method, url, params=params, json=json, headers=headers)
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as exc:  # noqa: BLE001
@@ -635,6 +1049,50 @@ class ExchangeGraphBackend:
             return {}
         return response.json()
 
+    def _batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send ``requests`` in ``$batch`` chunks and return their responses in request order."""
+
+        responses: List[Dict[str, Any]] = [{"status": 500}] * len(requests)
+        for start in range(0, len(requests), GRAPH_BATCH_SIZE):
+            pending = list(range(start, min(start + GRAPH_BATCH_SIZE, len(requests))))
+            for attempt in range(GRAPH_BATCH_RETRIES + 1):
+                payload = {
+                    "requests": [
+                        {"id": str(index), "headers": {"Content-Type": "application/json"}, **requests[index]}
+                        for index in pending
+                    ]
+                }
+                try:
+                    data = self._request("POST", "/$batch", json=payload)
+                except RuntimeError as exc:
+                    for index in pending:
+                        responses[index] = {"status": 500, "body": str(exc)}
+                    break
+                # Graph may answer batch items in any order.
+                by_id = {item.get("id"): item for item in data.get("responses", [])}
+                throttled: List[int] = []
+                delay = 0.0
+                for index in pending:
+                    item = by_id.get(str(index), {"status": 500})
+                    responses[index] = item
+                    if item.get("status") == 429:
+                        throttled.append(index)
+                        delay = max(delay, self._retry_after(item))
+                if not throttled or attempt == GRAPH_BATCH_RETRIES:
+                    break
+                logger.info("Exchange throttled %s batch requests; retrying in %.1fs", len(throttled), delay)
+                time.sleep(delay)
+                pending = throttled
+        return responses
+
+    def _retry_after(self, item: Dict[str, Any]) -> float:
+        headers = {key.lower(): value for key, value in (item.get("headers") or {}).items()}
+        try:
+            delay = float(headers.get("retry-after", GRAPH_RETRY_AFTER_DEFAULT))
+        except (TypeError, ValueError):
+            delay = GRAPH_RETRY_AFTER_DEFAULT
+        return min(max(delay, 0.0), GRAPH_RETRY_AFTER_MAX)
+
     def _paginate(
         self, path: str, *, params: Optional[Dict[str, Any]] = None, top: Optional[int] = None
     ) -> List[Dict[str, Any]]:
@@ -642,17 +1100,37 @@ class ExchangeGraphBackend:
             data = self._request("GET", path, params=params)
             return data.get("value", [])
 
-        items: List[Dict[str, Any]] = []
-        next_path: Optional[str] = path
-        next_params = params
-        while next_path:
-            data = self._request("GET", next_path, params=next_params, absolute=next_path.startswith("http"))
+        data = self._request("GET", path, params={**(params or {}), "$count": "true"})
+        items: List[Dict[str, Any]] = list(data.get("value", []))
+        next_link = data.get("@odata.nextLink")
+        total = data.get("@odata.count")
+        page_size = len(items)
+        if next_link and isinstance(total, int) and page_size:
+            # The first page tells us how many pages remain, so request them concurrently by
+            # offset instead of following nextLink one round trip at a time.
+            def fetch_page(skip: int) -> List[Dict[str, Any]]:
+                page_params = {**(params or {}), "$top": page_size, "$skip": skip}
+                return self._request("GET", path, params=page_params).get("value", [])
+
+            with ThreadPoolExecutor(max_workers=GRAPH_PAGE_CONCURRENCY) as pool:
+                for page in pool.map(fetch_page, range(page_size, total, page_size)):
+                    items.extend(page)
+            # Offsets can shift if the mailbox changes mid-listing; drop any repeated entries.
+            seen: set[str] = set()
+            unique: List[Dict[str, Any]] = []
+            for item in items:
+                item_id = item.get("id")
+                if item_id in seen:
+                    continue
+                if item_id:
+                    seen.add(item_id)
+                unique.append(item)
+            return unique
+
+        while next_link:
+            data = self._request("GET", next_link, absolute=True)
             items.extend(data.get("value", []))
             next_link = data.get("@odata.nextLink")
-            if not next_link:
-                break
-            next_path = next_link
-            next_params = None
         return items
 
     def _get_messages(
@@ -662,25 +1140,7 @@ class ExchangeGraphBackend:
         top: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
         params: Dict[str, Any] = {
-            "$select": ",".join(
-                [
-                    "id",
-                    "subject",
-                    "from",
-                    "toRecipients",
-                    "ccRecipients",
-                    "body",
-                    "bodyPreview",
-                    "receivedDateTime",
-                    "isRead",
-                    "flag",
-                    "conversationId",
-                    "internetMessageId",
-                    "parentFolderId",
-                    "webLink",
-                    "mimeContent",
-                ]
-            ),
+            "$select": GRAPH_MESSAGE_FIELDS,
             "$orderby": "receivedDateTime desc",
         }
         if filter:
@@ -691,10 +1151,134 @@ class ExchangeGraphBackend:
 
     def _load_folders(self, force: bool = False) -> Dict[str, Dict[str, Optional[str]]]:
         if self._folder_cache and not force:
-            timestamp, cache = self._folder_cache
+            timestamp, cache, _ = self._folder_cache
             if time.monotonic() - timestamp < 300:
                 return cache
 
+        # Only one caller refreshes an expired cache; the rest wait and reuse its result.
+        with self._folder_lock:
+            if self._folder_cache and not force:
+                timestamp, cache, _ = self._folder_cache
+                if time.monotonic() - timestamp < 300:
+                    return cache
+            if not self._sync_folder_delta():
+                self._folder_ids = self._list_all_folders()
+                self._folder_delta_link = None
+
+            path_map: Dict[str, Dict[str, Optional[str]]] = {}
+            for folder_id, info in self._folder_ids.items():
+                path = self._build_folder_path(folder_id, self._folder_ids)
+                if path:
+                    path_map[path] = info
+
+            self._store_folders(path_map)
+            return path_map
+
+    def _sync_folder_delta(self) -> bool:
+        """Apply mailFolders/delta changes to the folder id map; False if delta is unavailable."""
+
+        if self._folder_delta_link:
+            next_url: Optional[str] = self._folder_delta_link
+            folder_ids = dict(self._folder_ids)
+        else:
+            next_url = f"{self.GRAPH_BASE}{self._user_prefix}/mailFolders/delta?$select=id,displayName,parentFolderId"
+            folder_ids = {}
+        delta_link: Optional[str] = None
+        try:
+            while next_url:
+                data = self._request("GET", next_url, absolute=True)
+                for item in data.get("value", []):
+                    folder_id = item.get("id")
+                    if not folder_id:
+                        continue
+                    if "@removed" in item:
+                        folder_ids.pop(folder_id, None)
+                        continue
+                    folder_ids[folder_id] = {
+                        "id": folder_id,
+                        "name": item.get("displayName") or "",
+                        "parent": item.get("parentFolderId"),
+                    }
+                next_url = data.get("@odata.nextLink")
+                delta_link = data.get("@odata.deltaLink") or delta_link
+        except RuntimeError:
+            logger.warning("Exchange folder delta sync failed; falling back to a full listing", exc_info=True)
+            return False
+        if not delta_link:
+            return False
+        self._folder_ids = folder_ids
+        self._folder_delta_link = delta_link
+        return True
+
+    def _sync_message_delta(self) -> Optional[List[Dict[str, Any]]]:
+        """Return inbox messages that became read since the last delta round; None if delta is unavailable."""
+
+        initial = not self._message_delta_link
+        if initial:
+            next_url: Optional[str] = (
+                f"{self.GRAPH_BASE}{self._user_prefix}/mailFolders/inbox/messages/delta"
+                f"?$select={GRAPH_DELTA_FIELDS}"
+            )
+            seen_ids: set[str] = set()
+        else:
+            next_url = self._message_delta_link
+            seen_ids = set(self._seen_ids)
+        changed: Dict[str, str] = {}
+        delta_link: Optional[str] = None
+        try:
+            while next_url:
+                data = self._request("GET", next_url, absolute=True, prefer=GRAPH_DELTA_PREFERENCE)
+                for item in data.get("value", []):
+                    message_id = item.get("id")
+                    if not message_id:
+                        continue
+                    if "@removed" in item or not item.get("isRead"):
+                        seen_ids.discard(message_id)
+                        changed.pop(message_id, None)
+                    elif message_id not in seen_ids:
+                        # Read messages that change again (e.g. our own flag updates) are not new work.
+                        seen_ids.add(message_id)
+                        changed[message_id] = item.get("receivedDateTime") or ""
+                next_url = data.get("@odata.nextLink")
+                delta_link = data.get("@odata.deltaLink") or delta_link
+        except RuntimeError:
+            if self._message_delta_link:
+                # An expired delta token answers 410 Gone; start a fresh sync before giving up.
+                logger.info("Exchange message delta token rejected; restarting the sync", exc_info=True)
+                self._message_delta_link = None
+                return self._sync_message_delta()
+            logger.warning("Exchange message delta sync failed; falling back to a listing", exc_info=True)
+            return None
+        if not delta_link:
+            return None
+        message_ids = list(changed)
+        if initial:
+            message_ids = sorted(message_ids, key=changed.__getitem__, reverse=True)[:GRAPH_INITIAL_SEEN_LIMIT]
+        self._seen_ids = seen_ids
+        self._message_delta_link = delta_link
+        return self._get_messages_by_id(message_ids)
+
+    def _get_messages_by_id(self, message_ids: List[str]) -> List[Dict[str, Any]]:
+        prefix = self._user_prefix
+        responses = self._batch(
+            [
+                {
+                    "method": "GET",
+                    "url": f"{prefix}/messages/{message_id}?$select={GRAPH_MESSAGE_FIELDS}",
+                    "headers": {"Prefer": GRAPH_BODY_PREFERENCE},
+                }
+                for message_id in message_ids
+            ]
+        )
+        messages: List[Dict[str, Any]] = []
+        for message_id, response in zip(message_ids, responses):
+            if response.get("status", 500) >= 400:
+                logger.warning("Failed to fetch message %s: %s", message_id, response.get("body"))
+                continue
+            messages.append(self._parse_message(response.get("body") or {}))
+        return messages
+
+    def _list_all_folders(self) -> Dict[str, Dict[str, Optional[str]]]:
         data = self._paginate(
             f"{self._user_prefix}/mailFolders",
             params={"$select": "id,displayName,parentFolderId"},
@@ -709,15 +1293,11 @@ class ExchangeGraphBackend:
                 "name": item.get("displayName") or "",
                 "parent": item.get("parentFolderId"),
             }
+        return id_map
 
-        path_map: Dict[str, Dict[str, Optional[str]]] = {}
-        for folder_id, info in id_map.items():
-            path = self._build_folder_path(folder_id, id_map)
-            if path:
-                path_map[path] = info
-
-        self._folder_cache = (time.monotonic(), path_map)
-        return path_map
+    def _store_folders(self, path_map: Dict[str, Dict[str, Optional[str]]]) -> None:
+        paths_by_id = {info["id"]: path for path, info in path_map.items() if info.get("id")}
+        self._folder_cache = (time.monotonic(), path_map, paths_by_id)
 
     def _build_folder_path(
         self, folder_id: str, id_map: Dict[str, Dict[str, Optional[str]]]
@@ -745,15 +1325,12 @@ class ExchangeGraphBackend:
     def _folder_path_for_id(self, folder_id: Optional[str]) -> str:
         if not folder_id:
             return ""
-        folders = self._load_folders()
-        for path, info in folders.items():
-            if info.get("id") == folder_id:
-                return path
-        folders = self._load_folders(force=True)
-        for path, info in folders.items():
-            if info.get("id") == folder_id:
-                return path
-        return ""
+        self._load_folders()
+        path = self._folder_cache[2].get(folder_id) if self._folder_cache else None
+        if path is None:
+            self._load_folders(force=True)
+            path = self._folder_cache[2].get(folder_id) if self._folder_cache else None
+        return path or ""
 
     def _parse_message(self, item: Dict[str, Any]) -> Dict[str, Any]:
         subject = item.get("subject") or ""
@@ -766,7 +1343,7 @@ class ExchangeGraphBackend:
         body_content = body_obj.get("content") or ""
         body = body_content if body_content else item.get("bodyPreview") or ""
         if isinstance(body_obj, dict) and body_obj.get("contentType", "").lower() == "html":
-            body = self._strip_html(body)
+            body = _strip_html(body)
         received = item.get("receivedDateTime")
         try:
             if received:
@@ -776,14 +1353,6 @@ class ExchangeGraphBackend:
         except ValueError:
             received_at = datetime.now(timezone.utc)
 
-        raw_b64 = item.get("mimeContent")
-        raw = ""
-        if raw_b64:
-            try:
-                raw = base64.b64decode(raw_b64).decode("utf-8", errors="ignore")
-            except Exception:  # noqa: BLE001
-                raw = ""
-
         folder_path = self._folder_path_for_id(item.get("parentFolderId"))
         return {
             "uid": str(item.get("id")),
@@ -795,27 +1364,16 @@ class ExchangeGraphBackend:
             "thread_id": thread_id,
             "body": body,
             "received_at": received_at.isoformat(),
-            "raw": raw,
             "folder": folder_path or "",
         }
 
-    def _strip_html(self, value: str) -> str:
-        return re.sub(r"<[^>]+>", " ", value)
-
     def _format_address(self, entry: Optional[Dict[str, Any]]) -> str:
-        if not entry or "emailAddress" not in entry:
-            return ""
-        email_info = entry["emailAddress"]
-        address = email_info.get("address") or ""
-        name = email_info.get("name") or ""
-        if name and address:
-            return f"{name} <{address}>"
-        return address or name
+        return _format_address(*_address_pair(entry))
 
     def _format_addresses(self, entries: Optional[List[Dict[str, Any]]]) -> str:
         if not entries:
             return ""
-        return ", ".join(filter(None, (self._format_address(entry) for entry in entries)))
+        return _join_addresses(tuple(_address_pair(entry) for entry in entries))
 
     def _get_user(self) -> Dict[str, Any]:
         if self._user_cache:
@@ -860,6 +1418,9 @@ class EmailClient:
     def unflag(self, uid: int | str) -> None:
         self._backend.unflag(uid)
 
+    def bulk_move(self, moves: List[tuple[str, str]]) -> List[str]:
+        return self._backend.bulk_move(moves)
+
     def ensure_folder(self, folder: str) -> Any:
         return self._backend.ensure_folder(folder)
 
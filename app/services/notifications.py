@@ -33,7 +33,20 @@ class HomeAssistantNotifier:
         self.token = (settings.ha_token or "").strip() or None
         self.mobile_target = (settings.ha_mobile_target or "").strip() or None
         self._service = self._resolve_service_path(self.mobile_target)
-        self._client = httpx.AsyncClient(timeout=30)
+        self._notify_url = f"{self.base_url}/api/services/{self._service}"
+        self._status_url = f"{self.base_url}/api/"
+        # Authorization is fixed for the process, so it is set once on the pooled client. Kept-alive
+        # connections mean the HA hostname is only resolved when a new socket is opened, and the
+        # transport retries a failed connect once instead of dropping the notification.
+        self._client = httpx.AsyncClient(
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=1,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=300.0),
+            ),
+            headers={"Authorization": f"Bearer {self.token}"} if self.token else None,
+        )
 
     async def send_decision_request(
         self, message: dict, reason: str, safe_default: str, undo_token: str | None = None
@@ -95,14 +108,7 @@ class HomeAssistantNotifier:
             "data": {"tag": "inbox-steward-debug"},
         }
         try:
-            response = await self._client.post(
-                f"{self.base_url}/api/services/{self._service}",
-                headers={
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-            )
+            response = await self._client.post(self._notify_url, json=payload)
             response.raise_for_status()
             return {"ok": True, "status": response.status_code}
         except Exception as exc:  # noqa: BLE001
@@ -119,10 +125,7 @@ class HomeAssistantNotifier:
                 "error": self._missing_credentials_message(),
             }
         try:
-            response = await self._client.get(
-                f"{self.base_url}/api/",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
+            response = await self._client.get(self._status_url)
             response.raise_for_status()
             return {"ok": True, "status": response.status_code}
         except Exception as exc:  # noqa: BLE001
@@ -137,14 +140,7 @@ class HomeAssistantNotifier:
             logger.error('Home Assistant service path is not configured')
             return
         try:
-            response = await self._client.post(
-                f"{self.base_url}/api/services/{self._service}",
-                headers={
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-            )
+            response = await self._client.post(self._notify_url, json=payload)
             response.raise_for_status()
         except Exception:  # noqa: BLE001
             logger.exception("Failed to send notification %s", event)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import re
+from functools import lru_cache
 from textwrap import dedent
 from typing import Any, Dict
 
@@ -11,6 +14,157 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+JSON_DECODER = json.JSONDecoder()
+
+# (subject pattern, body pattern, folder, category), checked in order by the heuristic fallback.
+# Case-insensitive patterns scan the original text once, without folding a copy of the body first.
+FALLBACK_RULES = (
+    (re.compile("receipt|invoice|statement", re.I), None, "Finance/Receipts", "Finance"),
+    (re.compile("newsletter", re.I), re.compile("unsubscribe", re.I), "Newsletters", "Newsletter"),
+    (re.compile("appointment|meeting|schedule", re.I), None, "Home/Appointments", "Calendar"),
+)
+
+PROMPT_BODY_LIMIT = 2000
+
+# Reply headers and the RFC 3676 signature delimiter ("-- " alone); everything after the first one is
+# quoted history or boilerplate. A bare "--" is often a separator inside receipts, so it does not count.
+# Forwarded-message markers are left alone: a forwarded receipt or invite is the content.
+REPLY_BOUNDARY_PATTERN = re.compile(
+    r"^(?:On\b.*\bwrote:[ \t]*|-- |-{2,}\s*Original Message\s*-{2,}[ \t]*)$", re.M | re.I
+)
+QUOTED_LINE_PATTERN = re.compile(r"^[ \t]*>.*(?:\n|$)", re.M)
+
+# Templates are dedented once at import; only the per-email slots are filled per call.
+EMAIL_CONTEXT_TEMPLATE = dedent(
+    """
+    From: {sender}
+    To: {to}
+    Date: {received_at}
+    Subject: {subject}
+
+    Body (trimmed):
+    {body}
+    """
+).strip()
+
+SYSTEM_PROMPT_TEMPLATE = dedent(
+    """
+    You are an email triage engine. Output ONE JSON object only. No prose, no markdown, no code fences.
+    If you do not know a field, omit it. Do not include null, empty strings, or placeholder values.
+    Use timezone {timezone}. All datetimes must be ISO 8601 with explicit offset (e.g., 2025-10-21T15:00:00-07:00).
+    Prefer existing folders unless new_folder=true. Do NOT include any “think” fields inside the JSON.
+
+    ############################
+    # OUTPUT CONTRACT (STRICT) #
+    ############################
+    {{
+      "email_actions": {{
+        "lane": "quick" | "sticky" | "ignore",
+        "folder_path": "Parent/Child[/Grandchild]",
+        "new_folder": true | false,
+        "create_folder": true | false,
+        "move_now": true | false,
+        "flag": true | false,
+        "due_date": "YYYY-MM-DDTHH:MM:SS-07:00",
+        "snooze_until": "YYYY-MM-DDTHH:MM:SS-07:00",
+        "confidence": 0.0
+      }},
+
+      "calendar": {{
+        "create": true,
+        "title": "string",
+        "start": "YYYY-MM-DDTHH:MM:SS-07:00",
+        "end": "YYYY-MM-DDTHH:MM:SS-07:00",
+        "timezone": "America/Vancouver",
+        "location": "string",
+        "url": "string",
+        "notes": "string",
+        "target_calendar_hint": "Family|Home",
+        "confidence": 0.0
+      }},
+
+      "review": {{
+        "needs_decision": true,
+        "reason": "short explanation",
+        "options": ["Parent/ChildA","Parent/ChildB"],
+        "proposed_name": "NewChild"
+      }},
+
+      "archive": {{
+        "forward_pdf": true,
+        "target_email": "archive@example.com",
+        "reason": "short label for why"
+      }},
+
+      "meta": {{
+        "category": "Receipt|Newsletter|School|Finance|Action|Waiting|Calendar|Family|Work|Other",
+        "subtopic": "free text short label",
+        "message_hash": "stable-hash"
+      }}
+    }}
+
+    ######################
+    # ROUTING BEHAVIOR   #
+    ######################
+    - Never set folder_path to "Inbox" or "Archive".
+    - If calendar.create=true → lane="quick", move_now=true, flag=false (file immediately to folder_path; create folders if needed).
+    - If actionable but not a calendar → lane="sticky", flag=true, move_now=false. Include folder_path as the final destination after USER archives it.
+    - Receipts/newsletters/promos → lane="quick", move_now=true, flag=false.
+    - If no suitable existing folder and confidence ≥ 0.70 → set new_folder=true, create_folder=true, and propose a concise two-level folder_path. Do not ask for review in this case.
+    - Use review.needs_decision=true only for ambiguous choices between two existing folders; provide exactly two options.
+
+    ########################
+    # TITLE QUALITY RULES  #
+    ########################
+    - Titles must be SPECIFIC enough to disambiguate at a glance.
+      • Include WHO or WHAT the appointment/task is about (person, organization, subject).
+      • Include the TYPE (appointment, service, delivery, exam, etc).
+      • Optionally include a SHORT qualifier (e.g., location or provider) if it improves clarity.
+    - Avoid generic titles like "Dentist appointment", "Service appointment", "Meeting".
+    - Do NOT include sensitive identifiers (VINs, account numbers, tracking IDs) in the TITLE. Place those in calendar.notes if genuinely useful.
+    - Keep titles short and human.
+
+    #############################
+    # CALENDAR SELECTION RULES  #
+    #############################
+    - target_calendar_hint must be "Family" or "Home".
+    - If the event blocks real-world time (appointments, services, classes, travel) → prefer "Family".
+    - If it’s a personal reminder/digital task OR implies privacy → use "Home".
+    - If ambiguous, choose "Family" when it avoids double-booking; otherwise "Home".
+    - Do not include attendees.
+    """
+).strip()
+
+USER_PROMPT_TEMPLATE = dedent(
+    """
+    #########################################
+    # CALL CONTEXT                          #
+    #########################################
+    Timezone: {timezone}
+    Current folder: {current_folder}
+    Existing folders:
+    {existing_block}
+    Folder hints:
+    {hints_block}
+
+    #########################################
+    # EMAIL INPUT                           #
+    #########################################
+    {email_context}
+
+    #########################################
+    # REQUIRED OUTPUT                       #
+    #########################################
+    Return ONE JSON object only, matching the contract above. No extra text.
+    """
+)
+
+
+@lru_cache(maxsize=8)
+def _system_prompt(timezone: str) -> str:
+    # Identical across calls, so Ollama can reuse the prefilled prefix instead of re-reading it.
+    return SYSTEM_PROMPT_TEMPLATE.format(timezone=timezone)
+
 
 class OllamaClassifier:
     """Client responsible for prompting the local Ollama model."""
@@ -18,23 +172,91 @@ class OllamaClassifier:
     def __init__(self, endpoint: str | None = None, model: str | None = None) -> None:
         self.endpoint = endpoint or settings.ollama_endpoint
         self.model = model or settings.ollama_model
-        self._client = httpx.AsyncClient(timeout=60)
+        self._client: httpx.AsyncClient | None = None
+        # Bounds requests in flight so a backlog does not queue more work than Ollama runs in parallel.
+        self._semaphore = asyncio.Semaphore(max(1, settings.ollama_concurrency))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Built on first use rather than at import, so the pool belongs to the loop that serves requests.
+        # Ollama speaks plain HTTP/1.1, and a classification that stops streaming early closes its
+        # connection (see _generate), so kept-alive sockets mainly serve pings and streams that run
+        # to completion. The pool is sized to the classification concurrency.
+        if self._client is None or self._client.is_closed:
+            concurrency = max(1, settings.ollama_concurrency)
+            self._client = httpx.AsyncClient(
+                timeout=60,
+                limits=httpx.Limits(
+                    max_connections=concurrency + 1, max_keepalive_connections=concurrency, keepalive_expiry=300.0
+                ),
+            )
+        return self._client
 
     async def classify(self, prompt_context: Dict[str, Any]) -> Dict[str, Any]:
+        system = _system_prompt(prompt_context.get("timezone", settings.timezone))
         prompt = self._build_prompt(prompt_context)
         logger.debug("Sending prompt to Ollama: %s", prompt[:500])
         try:
-            response = await self._client.post(
-                f"{self.endpoint}/api/generate",
-                json={"model": self.model, "prompt": prompt, "stream": False},
-            )
-            response.raise_for_status()
-            content = response.json().get("response", "")
+            async with self._semaphore:
+                content = await self._generate(system, prompt)
             return self._parse_json(content)
         except Exception as exc:  # noqa: BLE001
             logger.exception("Falling back to heuristic classification: %s", exc)
             return self._fallback(prompt_context)
 
+    async def _generate(self, system: str, prompt: str) -> str:
+        """Stream a completion, stopping as soon as the first top-level JSON object is closed."""
+
+        chunks: list[str] = []
+        depth = 0
+        in_string = escaped = False
+        done_reason = None
+        # Deterministic output; generation is only capped when a limit is configured, since the cap
+        # also counts a reasoning model's thinking tokens.
+        options: Dict[str, Any] = {"temperature": 0}
+        if settings.ollama_num_predict:
+            options["num_predict"] = settings.ollama_num_predict
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": settings.ollama_keep_alive,
+            "options": options,
+        }
+        async with self.client.stream("POST", f"{self.endpoint}/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                fragment = data.get("response") or ""
+                chunks.append(fragment)
+                for char in fragment:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == "\\":
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"' and depth:
+                        in_string = True
+                    elif char == "{":
+                        depth += 1
+                    elif char == "}" and depth:
+                        depth -= 1
+                        if not depth:
+                            # Leaving the stream unread stops generation but also discards this
+                            # connection; that costs a TCP setup, far less than the tokens saved.
+                            return "".join(chunks)
+                if data.get("done"):
+                    done_reason = data.get("done_reason")
+                    break
+        # Only a closed object returns above; a truncated reply would parse to nothing, so raise and
+        # let classify fall back to the heuristic instead.
+        raise RuntimeError(f"Ollama reply ended without a complete JSON object (done_reason={done_reason})")
+
     async def ping(self) -> Dict[str, Any]:
         payload = {
             "model": self.model,
@@ -42,7 +264,7 @@ class OllamaClassifier:
             "stream": False,
         }
         try:
-            response = await self._client.post(f"{self.endpoint}/api/generate", json=payload)
+            response = await self.client.post(f"{self.endpoint}/api/generate", json=payload)
             response.raise_for_status()
             data = response.json()
             message = (data.get("response") or "").strip()
@@ -52,7 +274,9 @@ class OllamaClassifier:
             return {"ok": False, "error": str(exc)}
 
     async def close(self) -> None:
-        await self._client.aclose()
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
 
     def _build_prompt(self, context: Dict[str, Any]) -> str:
         timezone = context.get("timezone", settings.timezone)
@@ -61,162 +285,61 @@ class OllamaClassifier:
         existing_block = "\n".join(f"- {folder}" for folder in existing_folders) or "- (none)"
         hints = context.get("hints") or {}
         hints_block = "\n".join(f"- {hint}: {target}" for hint, target in hints.items()) or "- (none)"
-        body = (context.get("body") or "").strip()
-        if len(body) > 2000:
-            body = body[:2000] + "…"
-        email_context = dedent(
-            f"""
-            From: {context.get('sender', '')}
-            To: {context.get('to', '')}
-            Date: {context.get('received_at', '')}
-            Subject: {context.get('subject', '')}
-
-            Body (trimmed):
-            {body}
-            """
-        ).strip()
-        return dedent(
-            f"""
-            You are an email triage engine. Output ONE JSON object only. No prose, no markdown, no code fences.
-            If you do not know a field, omit it. Do not include null, empty strings, or placeholder values.
-            Use timezone {timezone}. All datetimes must be ISO 8601 with explicit offset (e.g., 2025-10-21T15:00:00-07:00).
-            Prefer existing folders unless new_folder=true. Do NOT include any “think” fields inside the JSON.
-
-            ############################
-            # OUTPUT CONTRACT (STRICT) #
-            ############################
-            {{
-              "email_actions": {{
-                "lane": "quick" | "sticky" | "ignore",
-                "folder_path": "Parent/Child[/Grandchild]",
-                "new_folder": true | false,
-                "create_folder": true | false,
-                "move_now": true | false,
-                "flag": true | false,
-                "due_date": "YYYY-MM-DDTHH:MM:SS-07:00",
-                "snooze_until": "YYYY-MM-DDTHH:MM:SS-07:00",
-                "confidence": 0.0
-              }},
-
-              "calendar": {{
-                "create": true,
-                "title": "string",
-                "start": "YYYY-MM-DDTHH:MM:SS-07:00",
-                "end": "YYYY-MM-DDTHH:MM:SS-07:00",
-                "timezone": "America/Vancouver",
-                "location": "string",
-                "url": "string",
-                "notes": "string",
-                "target_calendar_hint": "Family|Home",
-                "confidence": 0.0
-              }},
-
-              "review": {{
-                "needs_decision": true,
-                "reason": "short explanation",
-                "options": ["Parent/ChildA","Parent/ChildB"],
-                "proposed_name": "NewChild"
-              }},
-
-              "archive": {{
-                "forward_pdf": true,
-                "target_email": "archive@example.com",
-                "reason": "short label for why"
-              }},
-
-              "meta": {{
-                "category": "Receipt|Newsletter|School|Finance|Action|Waiting|Calendar|Family|Work|Other",
-                "subtopic": "free text short label",
-                "message_hash": "stable-hash"
-              }}
-            }}
-
-            ######################
-            # ROUTING BEHAVIOR   #
-            ######################
-            - Never set folder_path to "Inbox" or "Archive".
-            - If calendar.create=true → lane="quick", move_now=true, flag=false (file immediately to folder_path; create folders if needed).
-            - If actionable but not a calendar → lane="sticky", flag=true, move_now=false. Include folder_path as the final destination after USER archives it.
-            - Receipts/newsletters/promos → lane="quick", move_now=true, flag=false.
-            - If no suitable existing folder and confidence ≥ 0.70 → set new_folder=true, create_folder=true, and propose a concise two-level folder_path. Do not ask for review in this case.
-            - Use review.needs_decision=true only for ambiguous choices between two existing folders; provide exactly two options.
-
-            ########################
-            # TITLE QUALITY RULES  #
-            ########################
-            - Titles must be SPECIFIC enough to disambiguate at a glance.
-              • Include WHO or WHAT the appointment/task is about (person, organization, subject).
-              • Include the TYPE (appointment, service, delivery, exam, etc).
-              • Optionally include a SHORT qualifier (e.g., location or provider) if it improves clarity.
-            - Avoid generic titles like "Dentist appointment", "Service appointment", "Meeting".
-            - Do NOT include sensitive identifiers (VINs, account numbers, tracking IDs) in the TITLE. Place those in calendar.notes if genuinely useful.
-            - Keep titles short and human.
-
-            #############################
-            # CALENDAR SELECTION RULES  #
-            #############################
-            - target_calendar_hint must be "Family" or "Home".
-            - If the event blocks real-world time (appointments, services, classes, travel) → prefer "Family".
-            - If it’s a personal reminder/digital task OR implies privacy → use "Home".
-            - If ambiguous, choose "Family" when it avoids double-booking; otherwise "Home".
-            - Do not include attendees.
-
-            #########################################
-            # CALL CONTEXT                          #
-            #########################################
-            Timezone: {timezone}
-            Current folder: {current_folder}
-            Existing folders:
-            {existing_block}
-            Folder hints:
-            {hints_block}
-
-            #########################################
-            # EMAIL INPUT                           #
-            #########################################
-            {email_context}
-
-            #########################################
-            # REQUIRED OUTPUT                       #
-            #########################################
-            Return ONE JSON object only, matching the contract above. No extra text.
-            """
+        body = self._trim_body(context.get("body") or "")
+        email_context = EMAIL_CONTEXT_TEMPLATE.format(
+            sender=context.get("sender", ""),
+            to=context.get("to", ""),
+            received_at=context.get("received_at", ""),
+            subject=context.get("subject", ""),
+            body=body,
+        )
+        return USER_PROMPT_TEMPLATE.format(
+            timezone=timezone,
+            current_folder=current_folder,
+            existing_block=existing_block,
+            hints_block=hints_block,
+            email_context=email_context,
         )
 
+    def _trim_body(self, body: str) -> str:
+        # Drop quoted history and signatures before truncating, so the budget goes to the new text.
+        boundary = REPLY_BOUNDARY_PATTERN.search(body)
+        if boundary and body[: boundary.start()].strip():
+            body = body[: boundary.start()]
+        if ">" in body:
+            body = QUOTED_LINE_PATTERN.sub("", body)
+        body = body.strip()
+        if len(body) > PROMPT_BODY_LIMIT:
+            body = body[:PROMPT_BODY_LIMIT] + "…"
+        return body
+
     def _parse_json(self, payload: str) -> Dict[str, Any]:
         payload = payload.strip()
         if not payload:
             return {}
+        start = payload.find("{")
+        if start == -1:
+            logger.error("Unable to repair model JSON: %s", payload)
+            return {}
+        if start:
+            logger.warning("Repairing JSON from model output")
+        # raw_decode reads exactly one object and ignores whatever follows it, so prose or code
+        # fences around the JSON cost a single scan rather than a failed parse plus a retry.
         try:
-            return json.loads(payload)
+            result, _ = JSON_DECODER.raw_decode(payload, start)
         except json.JSONDecodeError:
-            logger.warning("Repairing JSON from model output")
-            start = payload.find("{")
-            end = payload.rfind("}")
-            if start != -1 and end != -1:
-                repaired = payload[start : end + 1]
-                try:
-                    return json.loads(repaired)
-                except json.JSONDecodeError:
-                    logger.error("Unable to repair model JSON: %s", payload)
+            logger.error("Unable to repair model JSON: %s", payload)
             return {}
+        return result if isinstance(result, dict) else {}
 
     def _fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        subject = context.get("subject", "").lower()
-        body = context.get("body", "").lower()
-        folder = None
-        category = "Other"
-        if any(keyword in subject for keyword in ["receipt", "invoice", "statement"]):
-            folder = "Finance/Receipts"
-            category = "Finance"
-        elif "newsletter" in subject or "unsubscribe" in body:
-            folder = "Newsletters"
-            category = "Newsletter"
-        elif any(keyword in subject for keyword in ["appointment", "meeting", "schedule"]):
-            folder = "Home/Appointments"
-            category = "Calendar"
-        else:
-            folder = "Home/Misc"
+        subject = context.get("subject") or ""
+        body = context.get("body") or ""
+        folder, category = "Home/Misc", "Other"
+        for subject_pattern, body_pattern, rule_folder, rule_category in FALLBACK_RULES:
+            if subject_pattern.search(subject) or (body_pattern and body_pattern.search(body)):
+                folder, category = rule_folder, rule_category
+                break
         lane = "quick" if folder in {"Finance/Receipts", "Newsletters"} else "sticky"
         move_now = lane == "quick"
         return {
@@ -229,7 +352,7 @@ class OllamaClassifier:
                 "flag": lane == "sticky",
                 "confidence": 0.5,
             },
-            "meta": {"category": category},
+            "meta": {"category": category, "fallback": True},
         }
 
 
@@ -1,37 +1,51 @@
 from __future__ import annotations
 
 import re
+import sys
+from functools import lru_cache
 from typing import Dict
 
-ROOT_FOLDERS = {
-    "School",
-    "Finance",
-    "Newsletters",
-    "Vehicle",
-    "Health",
-    "Work",
-    "Family",
-    "Home",
-}
+ROOT_FOLDERS = frozenset(
+    {
+        "School",
+        "Finance",
+        "Newsletters",
+        "Vehicle",
+        "Health",
+        "Work",
+        "Family",
+        "Home",
+    }
+)
 
 
 class FolderNamer:
-    pattern = re.compile(r"[^A-Za-z0-9/]+")
+    pattern = re.compile(r"[A-Za-z0-9/]+")
 
     def normalize(self, folder: str) -> str:
-        folder = folder.strip()
-        if not folder:
-            return "Misc"
-        parts = [self._title_case(part) for part in folder.split("/") if part]
-        if not parts:
-            return "Misc"
-        if parts[0] not in ROOT_FOLDERS:
-            parts.insert(0, "Misc")
-        return "/".join(parts)
+        return _normalize_folder(folder)
 
     def _title_case(self, value: str) -> str:
-        value = self.pattern.sub(" ", value)
-        return " ".join(word.capitalize() for word in value.split())
+        return _title_case(value)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_folder(folder: str) -> str:
+    # Model output repeats the same handful of paths, so cache and intern the result.
+    folder = folder.strip()
+    if not folder:
+        return "Misc"
+    parts = [_title_case(part) for part in folder.split("/") if part]
+    if not parts:
+        return "Misc"
+    if parts[0] not in ROOT_FOLDERS:
+        parts.insert(0, "Misc")
+    return sys.intern("/".join(parts))
+
+
+def _title_case(value: str) -> str:
+    # Matching the allowed runs directly replaces a sub() pass plus a split() over its output.
+    return " ".join([word.capitalize() for word in FolderNamer.pattern.findall(value)])
 
 
 DEFAULT_FOLDERS: Dict[str, str] = {
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import contextlib
+import hashlib
 import logging
+import os
+import tempfile
+from collections import OrderedDict
+from io import BytesIO
 from pathlib import Path
 from typing import Optional
 
@@ -10,19 +16,65 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+PDF_TEXT_CACHE_SIZE = 128
+
+# Extracted text by content digest; recurring statements and receipts are byte-identical.
+_text_cache: OrderedDict[str, Optional[str]] = OrderedDict()
+
+# Set once the temp directory has been created so later saves skip the mkdir call.
+_dir_ready = False
+
 
 def extract_text_from_pdf(path: Path) -> Optional[str]:
     try:
-        reader = PdfReader(path)
+        content = path.read_bytes()
+    except OSError:
+        logger.exception("Failed to read PDF %s", path)
+        return None
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    if digest in _text_cache:
+        _text_cache.move_to_end(digest)
+        return _text_cache[digest]
+    try:
+        reader = PdfReader(BytesIO(content))
         text = "\n".join(page.extract_text() or "" for page in reader.pages)
-        return text.strip() or None
     except Exception:  # noqa: BLE001
         logger.exception("Failed to read PDF %s", path)
         return None
+    result = text.strip() or None
+    _text_cache[digest] = result
+    if len(_text_cache) > PDF_TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return result
 
 
 def save_temp_pdf(filename: str, content: bytes) -> Path:
-    settings.pdf_temp_dir.mkdir(parents=True, exist_ok=True)
-    target = settings.pdf_temp_dir / filename
-    target.write_bytes(content)
+    global _dir_ready
+    # Name files by content so a recurring attachment maps to the file already on disk.
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    target = settings.pdf_temp_dir / f"{digest}-{filename}"
+    if target.exists():
+        return target
+    if not _dir_ready:
+        settings.pdf_temp_dir.mkdir(parents=True, exist_ok=True)
+        _dir_ready = True
+    try:
+        _write_atomic(target, content)
+    except FileNotFoundError:
+        # The temp directory was cleaned up after it was first created.
+        settings.pdf_temp_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(target, content)
     return target
+
+
+def _write_atomic(target: Path, content: bytes) -> None:
+    # Existing files are reused as-is, so one must never be visible half-written.
+    fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+        os.replace(temp_path, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise